@@ -0,0 +1,271 @@
+"""
+/***************************************************************************
+    Benchmarks of the spline interpolation and of the Lines to splines
+    Processing algorithm
+                              -------------------
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+
+Run with the Python interpreter of a QGIS installation from the repository root:
+
+    python benchmarks/bench_spline.py                   # run and compare with the stored baseline
+    python benchmarks/bench_spline.py --save-baseline   # run and store the results as the new baseline
+    python benchmarks/bench_spline.py --quick           # smaller inputs, for a fast check
+
+Each case reports throughput in knots/s and output vertices/s and the peak memory of Python allocations
+(tracemalloc, NumPy buffers included). Comparing with the baseline fails (exit code 1) when a case is slower
+by more than --threshold percent.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import traceback
+import tracemalloc
+
+import numpy as np
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+from qgis.core import (  # noqa: E402
+    QgsApplication,
+    QgsFeature,
+    QgsGeometry,
+    QgsPoint,
+    QgsPointXY,
+    QgsVectorLayer,
+)
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+KNOTS = [10, 100, 1000, 10000, 100000]
+QUICK_KNOTS = [10, 100, 1000]
+MAX_SEGMENTS = [10, 50]
+TOLERANCES = [0.01, 1.0]
+TIGHTNESS = 0.5
+CURVATURES = {"gentle": 0.05, "winding": 0.8}
+# simplify_points() gets QgsPoint lists of densified lines, larger ones take too much memory
+SIMPLIFY_MAX_KNOTS = 10000
+# many short lines interpolated one by one and with interpolate_many()
+MANY_LINES = 10000
+MANY_KNOTS = 8
+# features of the Processing algorithm layer and their knots
+LAYER_FEATURES = 1000
+LAYER_KNOTS = 50
+
+
+def synthetic_line(knots, curvature, seed=0):
+    """(knots, 2) array of a polyline with steps of random length and heading changing by curvature radians."""
+    rng = np.random.default_rng(seed)
+    heading = np.cumsum(rng.normal(0.0, curvature, knots))
+    step = rng.uniform(5.0, 15.0, knots)
+    xy = np.column_stack((np.cumsum(step * np.cos(heading)), np.cumsum(step * np.sin(heading))))
+    return xy
+
+
+def measure(func, repeat):
+    """Best time of repeated func() calls, peak memory of one call and the result of the last one."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak, result
+
+
+def record(results, name, knots, out_vertices, elapsed, peak):
+    elapsed = max(elapsed, 1e-9)
+    results[name] = {
+        "seconds": elapsed,
+        "knots_per_s": knots / elapsed,
+        "vertices_per_s": out_vertices / elapsed,
+        "peak_mb": peak / 1e6,
+    }
+    print(
+        "{:<60} {:>10.4f} s {:>14.0f} knots/s {:>14.0f} vertices/s {:>9.2f} MB".format(
+            name, elapsed, knots / elapsed, out_vertices / elapsed, peak / 1e6
+        )
+    )
+
+
+def bench_interp(results, knots_list, repeat):
+    from spline.spline_interp import hermite, hermite_array, interpolate, simplify_points
+
+    for curvature_name, curvature in CURVATURES.items():
+        for knots in knots_list:
+            xy = synthetic_line(knots, curvature)
+            points = [QgsPoint(x, y) for x, y in xy]
+            for max_segments in MAX_SEGMENTS:
+                for tolerance in TOLERANCES:
+                    case = "{} knots={} max_segments={} tolerance={}".format(
+                        curvature_name, knots, max_segments, tolerance
+                    )
+                    elapsed, peak, out = measure(
+                        lambda: hermite(points, tolerance, TIGHTNESS, max_segments), repeat
+                    )
+                    record(results, "hermite " + case, knots, len(out), elapsed, peak)
+                    elapsed, peak, out = measure(
+                        lambda: hermite_array(xy, tolerance, TIGHTNESS, max_segments), repeat
+                    )
+                    record(results, "hermite_array " + case, knots, len(out), elapsed, peak)
+                    elapsed, peak, out = measure(
+                        lambda: hermite_array(xy, tolerance, TIGHTNESS, max_segments, adaptive=True), repeat
+                    )
+                    record(results, "hermite_array adaptive " + case, knots, len(out), elapsed, peak)
+                    elapsed, peak, out = measure(
+                        lambda: interpolate(points, tolerance, TIGHTNESS, max_segments, False), repeat
+                    )
+                    record(results, "interpolate " + case, knots, len(out), elapsed, peak)
+
+            # simplification of a densified line, as done by interpolate() with fixed sampling
+            if knots > SIMPLIFY_MAX_KNOTS:
+                continue
+            dense = hermite_array(xy, 0.0, TIGHTNESS, MAX_SEGMENTS[-1])
+            dense_points = [QgsPoint(x, y) for x, y in dense]
+            for tolerance in TOLERANCES:
+                case = "{} knots={} vertices={} tolerance={}".format(curvature_name, knots, len(dense), tolerance)
+                elapsed, peak, out = measure(lambda: simplify_points(dense_points, tolerance), repeat)
+                record(results, "simplify_points " + case, knots, len(out), elapsed, peak)
+
+
+def bench_many(results, repeat):
+    from spline.spline_interp import hermite_array, interpolate_many
+
+    lines = [synthetic_line(MANY_KNOTS, CURVATURES["winding"], seed=i) for i in range(MANY_LINES)]
+    coords = np.concatenate(lines)
+    offsets = np.arange(0, len(coords) + 1, MANY_KNOTS)
+    knots = len(coords)
+    for tolerance in TOLERANCES:
+        case = "lines={} knots={} tolerance={}".format(MANY_LINES, MANY_KNOTS, tolerance)
+        elapsed, peak, out = measure(
+            lambda: [hermite_array(xy, tolerance, TIGHTNESS, MAX_SEGMENTS[-1]) for xy in lines], repeat
+        )
+        record(results, "hermite_array per line " + case, knots, sum(len(xy) for xy in out), elapsed, peak)
+        elapsed, peak, out = measure(
+            lambda: interpolate_many(coords, offsets, tolerance, TIGHTNESS, MAX_SEGMENTS[-1], False), repeat
+        )
+        record(results, "interpolate_many " + case, knots, len(out[0]), elapsed, peak)
+
+
+def bench_processing(results, repeat):
+    # the Processing plugin is not on the path of a standalone QGIS interpreter
+    plugins_dir = os.path.join(QgsApplication.pkgDataPath(), "python", "plugins")
+    if plugins_dir not in sys.path:
+        sys.path.append(plugins_dir)
+    from processing.core.Processing import Processing
+    from qgis import processing
+
+    Processing.initialize()
+    from spline.processing_provider.provider import Provider
+
+    provider = Provider()
+    QgsApplication.processingRegistry().addProvider(provider)
+    try:
+        for curvature_name, curvature in CURVATURES.items():
+            layer = QgsVectorLayer("LineString?crs=EPSG:3857", "bench", "memory")
+            features = []
+            for i in range(LAYER_FEATURES):
+                xy = synthetic_line(LAYER_KNOTS, curvature, seed=i)
+                f = QgsFeature()
+                f.setGeometry(QgsGeometry.fromPolylineXY([QgsPointXY(x, y) for x, y in xy]))
+                features.append(f)
+            layer.dataProvider().addFeatures(features)
+            knots = LAYER_FEATURES * LAYER_KNOTS
+            for tolerance in TOLERANCES:
+                params = {
+                    "INPUT": layer,
+                    "TENSION": TIGHTNESS,
+                    "TOLERANCE": tolerance,
+                    "MAX_SEGMENTS": MAX_SEGMENTS[-1],
+                    "ADAPTIVE": False,
+                    "OUTPUT": "memory:",
+                }
+
+                def run():
+                    return processing.run("spline:lines2splines", params)["OUTPUT"]
+
+                elapsed, peak, out = measure(run, repeat)
+                out_vertices = sum(len(list(f.geometry().vertices())) for f in out.getFeatures())
+                case = "{} features={} knots={} tolerance={}".format(
+                    curvature_name, LAYER_FEATURES, LAYER_KNOTS, tolerance
+                )
+                record(results, "lines2splines " + case, knots, out_vertices, elapsed, peak)
+    finally:
+        QgsApplication.processingRegistry().removeProvider(provider)
+
+
+def compare(results, baseline, threshold):
+    slower = []
+    for name, result in sorted(results.items()):
+        base = baseline.get(name)
+        if base is None:
+            continue
+        change = (result["seconds"] / base["seconds"] - 1.0) * 100.0
+        if change > threshold:
+            slower.append((name, change))
+    for name, change in slower:
+        print("SLOWER by {:.0f} %: {}".format(change, name))
+    return not slower
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Spline plugin benchmarks")
+    parser.add_argument("--save-baseline", action="store_true", help="store results as the new baseline")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="baseline JSON file")
+    parser.add_argument("--threshold", type=float, default=20.0, help="allowed slowdown against baseline in percent")
+    parser.add_argument("--repeat", type=int, default=3, help="number of runs of each case, the best one counts")
+    parser.add_argument("--quick", action="store_true", help="only small inputs")
+    parser.add_argument("--no-processing", action="store_true", help="skip the Processing algorithm benchmark")
+    args = parser.parse_args()
+
+    qgs = QgsApplication([], False)
+    qgs.initQgis()
+    results = {}
+    stages = [
+        lambda: bench_interp(results, QUICK_KNOTS if args.quick else KNOTS, args.repeat),
+        lambda: bench_many(results, args.repeat),
+    ]
+    if not args.no_processing:
+        stages.append(lambda: bench_processing(results, args.repeat))
+    # results of the stages run before a failing one are still saved or compared
+    failed = False
+    try:
+        for stage in stages:
+            try:
+                stage()
+            except Exception:
+                traceback.print_exc()
+                failed = True
+    finally:
+        qgs.exitQgis()
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=1, sort_keys=True)
+        print("Baseline saved to {}".format(args.baseline))
+        return 1 if failed else 0
+    if not os.path.exists(args.baseline):
+        print("No baseline at {}, run with --save-baseline to create it".format(args.baseline))
+        return 1 if failed else 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    return 0 if compare(results, baseline, args.threshold) and not failed else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
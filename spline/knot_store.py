@@ -0,0 +1,251 @@
+"""
+/***************************************************************************
+    Knots and parameters of digitized splines, for editing them later
+                              -------------------
+        begin                : October 2026
+        copyright            : (C) 2026 by the Spline plugin contributors
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+
+Records are kept in a table in the QGIS profile directory, one row per feature of a layer data source, so each
+edit writes just its own record. Each record holds the hash of the geometry it was made for: a record of a geometry
+changed by other tools does not apply anymore. Records set while editing are written when the layer is committed,
+those of added features are matched to their final ids by the hash then.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+
+import numpy as np
+
+from qgis.core import QgsApplication, QgsFeatureRequest, QgsGeometry, QgsWkbTypes
+
+from .spline_interp import interpolation_params
+from .utils import OUTPUT_ARCS, OUTPUT_LINES
+from .wkb import WKB_LINESTRING, WKB_POLYGON, WkbBuilder, read_arcs, read_wkb
+
+# file of the records, in the QGIS profile directory
+KNOTS_FILE = os.path.join("spline", "knots.sqlite")
+
+_stores = {}
+_db = None
+
+
+def knots_db():
+    """Connection to the table of records, opened on first use."""
+    global _db
+    if _db is None:
+        path = os.path.join(QgsApplication.qgisSettingsDirPath(), KNOTS_FILE)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        _db = sqlite3.connect(path)
+        _db.execute(
+            "CREATE TABLE IF NOT EXISTS knots (source TEXT NOT NULL, fid INTEGER NOT NULL, record TEXT NOT NULL, "
+            "PRIMARY KEY (source, fid))"
+        )
+        _db.commit()
+    return _db
+
+
+def knot_store(layer):
+    """Knot store of layer, created on first use."""
+    store = _stores.get(layer.id())
+    if store is None:
+        store = _stores[layer.id()] = KnotStore(layer)
+        layer.willBeDeleted.connect(lambda: _stores.pop(layer.id(), None))
+    return store
+
+
+def geometry_hash(geom):
+    """
+    Hash of the x and y of a single part geometry (multi-part geometry with one part too), so that conversions
+    by providers on commit do not change it. None for other geometries.
+    """
+    if geom is None or geom.isNull():
+        return None
+    part = geom.constGet()
+    if QgsWkbTypes.isMultiType(part.wkbType()):
+        if part.numGeometries() != 1:
+            return None
+        part = part.geometryN(0)
+    part = part.clone()
+    part.dropZValue()
+    part.dropMValue()
+    return hashlib.sha1(bytes(part.asWkb())).hexdigest()
+
+
+def spline_record(knots, knot_vertices, output_mode, params=None, closed=False):
+    """
+    Record of a spline of (N, 2) knots with indices knot_vertices in the spline vertices, interpolated with params
+    (tolerance, tension, max_segments, adaptive - from the settings if None). See KnotStore.
+    """
+    tolerance, tension, max_segments, adaptive = params or interpolation_params(None, None, None, None)
+    return {
+        "knots": np.asarray(knots, dtype=float).tolist(),
+        "knot_vertices": np.asarray(knot_vertices).tolist(),
+        "tension": tension,
+        "tolerance": tolerance,
+        "max_segments": max_segments,
+        "adaptive": adaptive,
+        "output_mode": output_mode,
+        "closed": closed,
+    }
+
+
+def layer_output_mode(layer, output_mode):
+    """Output mode for layer: circular arcs need a curved geometry type, lines are written to other layers."""
+    if output_mode == OUTPUT_ARCS and not QgsWkbTypes.isCurvedType(layer.wkbType()):
+        return OUTPUT_LINES
+    return output_mode
+
+
+def spline_geometry(vertices, straight, is_polygon, closed=False):
+    """
+    Line or polygon geometry of (N, 2) spline vertices, curved with arcs if straight (mask of straight arcs) is not
+    None, see WkbBuilder.add_arcs(). Rings not splined as closed lines are closed by a straight segment.
+    """
+    if is_polygon and not closed:
+        if straight is None:
+            vertices = np.concatenate((vertices, vertices[:1]))
+        else:
+            vertices = np.concatenate((vertices, (vertices[-1:] + vertices[:1]) / 2.0, vertices[:1]))
+            straight = np.append(straight, True)
+    builder = WkbBuilder(WKB_POLYGON if is_polygon else WKB_LINESTRING, False, False, 1, curved=straight is not None)
+    builder.begin_part(1)
+    if straight is None:
+        builder.add_ring(vertices)
+    else:
+        builder.add_arcs(vertices, straight)
+    geom = QgsGeometry()
+    geom.fromWkb(builder.wkb())
+    return geom
+
+
+def geometry_spline(geom, arcs, is_polygon, closed=False):
+    """
+    Spline vertices and mask of straight arcs (None if not arcs) of a geometry made by spline_geometry(),
+    its z and m are dropped.
+    """
+    data = geom.asWkb().data()
+    if arcs:
+        vertices, straight = read_arcs(data)[3][0][0]
+    else:
+        vertices, straight = read_wkb(data)[3][0][0], None
+    vertices = vertices[:, :2]
+    if is_polygon and not closed:
+        # the closing segment
+        if straight is None:
+            vertices = vertices[:-1]
+        else:
+            vertices, straight = vertices[:-2], straight[:-1]
+    return vertices, straight
+
+
+class KnotStore(object):
+    """
+    Records of splines of layer features by feature id. A record is a dictionary of the spline knots in layer
+    coordinates ("knots"), indices of the knots in the geometry vertices ("knot_vertices"), the interpolation
+    parameters ("tension", "tolerance", "max_segments", "adaptive"), the output mode ("output_mode") and
+    "closed" for rings splined as closed lines.
+    """
+
+    def __init__(self, layer):
+        self.layer = layer
+        # records of memory layers live as long as their features, in memory
+        self.db = None if layer.providerType() == "memory" else knots_db()
+        self.source = layer.source()
+        self.stored = {}
+        # records set while editing, by feature id, the oldest first - undo returns to an older geometry
+        self.pending = {}
+        layer.committedFeaturesAdded.connect(self.features_committed)
+        layer.committedFeaturesRemoved.connect(self.features_removed)
+        layer.afterCommitChanges.connect(self.changes_committed)
+        layer.afterRollBack.connect(self.rolled_back)
+
+    def record(self, feature):
+        """Record of feature, None if there is none or its geometry was changed without the record."""
+        feature_hash = geometry_hash(feature.geometry())
+        for record in reversed(self.pending.get(feature.id(), [])):
+            if record["hash"] == feature_hash:
+                return record
+        record = self.stored_record(feature.id())
+        if record is None or record["hash"] != feature_hash:
+            return None
+        return record
+
+    def set_record(self, fid, geom, record):
+        """Stores record of feature fid with geometry geom."""
+        self.set_records([(fid, geom, record)])
+
+    def set_records(self, items):
+        """Stores (feature id, geometry, record) items, they are written to the table when the layer is committed."""
+        for fid, geom, record in items:
+            record["hash"] = geometry_hash(geom)
+            self.pending.setdefault(fid, []).append(record)
+
+    def stored_record(self, fid):
+        if self.db is None:
+            return self.stored.get(fid)
+        row = self.db.execute("SELECT record FROM knots WHERE source = ? AND fid = ?", (self.source, fid)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def store(self, records):
+        """Writes {feature id: record} records."""
+        if self.db is None:
+            self.stored.update(records)
+            return
+        with self.db:
+            self.db.executemany(
+                "INSERT OR REPLACE INTO knots (source, fid, record) VALUES (?, ?, ?)",
+                [(self.source, fid, json.dumps(record)) for fid, record in records.items()],
+            )
+
+    def features_committed(self, layer_id, features):
+        # records of added features are moved from their temporary ids to the committed ones
+        added = {}
+        for fid in [fid for fid in self.pending if fid < 0]:
+            for record in self.pending.pop(fid):
+                added[record["hash"]] = record
+        committed = {}
+        for feature in features:
+            record = added.get(geometry_hash(feature.geometry()))
+            if record is not None:
+                committed[feature.id()] = record
+        self.store(committed)
+
+    def changes_committed(self):
+        # the record of the committed geometry of each changed feature
+        pending, self.pending = self.pending, {}
+        fids = [fid for fid in pending if fid >= 0]
+        if not fids:
+            return
+        request = QgsFeatureRequest().setFilterFids(fids).setNoAttributes()
+        committed = {}
+        for feature in self.layer.getFeatures(request):
+            feature_hash = geometry_hash(feature.geometry())
+            for record in reversed(pending[feature.id()]):
+                if record["hash"] == feature_hash:
+                    committed[feature.id()] = record
+                    break
+        self.store(committed)
+
+    def features_removed(self, layer_id, fids):
+        for fid in fids:
+            self.pending.pop(fid, None)
+            self.stored.pop(fid, None)
+        if self.db is not None:
+            with self.db:
+                self.db.executemany(
+                    "DELETE FROM knots WHERE source = ? AND fid = ?", [(self.source, fid) for fid in fids]
+                )
+
+    def rolled_back(self):
+        self.pending = {}
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+
+Incremental update of a splines layer: output features keep the id of their source feature and a hash of its
+geometry, attributes and the parameters, so only added, modified and deleted source features are written again.
+"""
+
+from qgis.PyQt.QtCore import QVariant
+from qgis.core import (
+    QgsFeature,
+    QgsFeatureRequest,
+    QgsField,
+    QgsFields,
+    QgsProcessingException,
+    QgsVectorDataProvider,
+)
+
+SRC_FID_FIELD = "spline_src_fid"
+HASH_FIELD = "spline_hash"
+
+UPDATE_CAPABILITIES = (
+    QgsVectorDataProvider.AddFeatures
+    | QgsVectorDataProvider.DeleteFeatures
+    | QgsVectorDataProvider.ChangeGeometries
+    | QgsVectorDataProvider.ChangeAttributeValues
+)
+
+
+def tracked_fields(fields):
+    """Source fields with the source feature id and hash fields appended."""
+    out_fields = QgsFields(fields)
+    out_fields.append(QgsField(SRC_FID_FIELD, QVariant.LongLong))
+    out_fields.append(QgsField(HASH_FIELD, QVariant.String, len=40))
+    return out_fields
+
+
+class SplinesLayerUpdater(object):
+    """
+    Writes spline features with tracked_fields() into a splines layer created before with the same fields.
+    Features of the layer are matched by source feature id, the hash tells if the source feature changed.
+    """
+
+    def __init__(self, layer, fields):
+        self.provider = layer.dataProvider()
+        if (self.provider.capabilities() & UPDATE_CAPABILITIES) != UPDATE_CAPABILITIES:
+            raise QgsProcessingException("The splines layer to update does not support editing.")
+        layer_fields = self.provider.fields()
+        src_fid_idx = layer_fields.lookupField(SRC_FID_FIELD)
+        hash_idx = layer_fields.lookupField(HASH_FIELD)
+        if src_fid_idx < 0 or hash_idx < 0:
+            raise QgsProcessingException(
+                "The splines layer to update has no {} and {} fields, "
+                "create it with source ids and hashes stored.".format(SRC_FID_FIELD, HASH_FIELD)
+            )
+        # indices of layer fields of output fields
+        self.field_map = [layer_fields.lookupField(field.name()) for field in fields]
+        self.layer_fields = layer_fields
+
+        # source feature id -> (layer feature id, hash)
+        request = QgsFeatureRequest()
+        request.setFlags(QgsFeatureRequest.NoGeometry)
+        request.setSubsetOfAttributes([src_fid_idx, hash_idx])
+        self.index = {}
+        for feature in self.provider.getFeatures(request):
+            self.index[feature[src_fid_idx]] = (feature.id(), feature[hash_idx])
+        self.seen = set()
+        # layer features of source features whose new splines were rejected
+        self.stale = []
+        self.unchanged = 0
+        self.modified = 0
+        self.added = 0
+        self.deleted = 0
+
+    def is_unchanged(self, src_fid, feature_hash):
+        self.seen.add(src_fid)
+        previous = self.index.get(src_fid)
+        if previous is not None and previous[1] == feature_hash:
+            self.unchanged += 1
+            return True
+        return False
+
+    def write(self, features):
+        """Changes layer features of modified source features and adds those of new ones."""
+        geometries = {}
+        attributes = {}
+        new_features = []
+        for feature in features:
+            values = feature.attributes()
+            layer_values = {idx: value for idx, value in zip(self.field_map, values) if idx >= 0}
+            previous = self.index.get(values[-2])
+            if previous is not None:
+                geometries[previous[0]] = feature.geometry()
+                attributes[previous[0]] = layer_values
+                continue
+            new_feature = QgsFeature(self.layer_fields)
+            new_feature.setGeometry(feature.geometry())
+            for idx, value in layer_values.items():
+                new_feature.setAttribute(idx, value)
+            new_features.append(new_feature)
+        if geometries:
+            self.provider.changeGeometryValues(geometries)
+            self.provider.changeAttributeValues(attributes)
+            self.modified += len(geometries)
+        if new_features:
+            self.provider.addFeatures(new_features)
+            self.added += len(new_features)
+
+    def reject(self, src_fid):
+        """The new spline of source feature src_fid was rejected, its outdated layer feature is deleted."""
+        previous = self.index.get(src_fid)
+        if previous is not None:
+            self.stale.append(previous[0])
+
+    def delete_stale(self, unseen=True):
+        """
+        Deletes layer features of rejected source features and, if unseen is True, those whose source features
+        were not seen - only when the whole source was read, otherwise they may just be left out of it.
+        """
+        fids = list(self.stale)
+        if unseen:
+            fids += [fid for src_fid, (fid, _) in self.index.items() if src_fid not in self.seen]
+        if fids:
+            self.provider.deleteFeatures(fids)
+        self.deleted = len(fids)
@@ -11,33 +11,114 @@
 ***************************************************************************
 """
 
-from qgis.PyQt.QtCore import QCoreApplication, QSettings
+import os
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain, islice
+
+import numpy as np
+
+from qgis.PyQt.QtCore import QCoreApplication, QThread, QVariant
 from qgis.core import (
+    QgsApplication,
     QgsFeature,
     QgsGeometry,
-    QgsPointXY,
     QgsProcessing,
     QgsFeatureSink,
+    QgsField,
+    QgsFields,
     QgsProcessingException,
     QgsProcessingAlgorithm,
+    QgsProcessingFeatureSourceDefinition,
+    QgsProcessingParameterBoolean,
+    QgsProcessingParameterDefinition,
+    QgsProcessingParameterEnum,
     QgsProcessingParameterNumber,
     QgsProcessingParameterFeatureSource,
     QgsProcessingParameterFeatureSink,
+    QgsProcessingParameterFileDestination,
+    QgsProcessingParameterVectorLayer,
+    QgsProcessingUtils,
+    QgsVectorLayer,
     QgsWkbTypes,
 )
 from qgis import processing
-from ..spline_interp import interpolate
-
-SINGLE_LINE_TYPES = (
-    QgsWkbTypes.LineString,
-    QgsWkbTypes.LineStringM,
-    QgsWkbTypes.LineStringZ,
-    QgsWkbTypes.LineStringZM,
-    QgsWkbTypes.LineString25D,
-    QgsWkbTypes.LineGeometry,
+from ..profiling import PROFILE_ENV, profiler
+from ..result_cache import ResultCache, cache_key
+from ..settings import spline_settings
+from ..spline_core import (
+    cumulative_length,
+    interpolate_values,
+    knot_values_are_valid,
+    self_intersects,
+    smooth_knots,
+    values_line_is_valid,
 )
+from ..spline_interp import interpolate_arcs, interpolate_many, interpolate_stream
+from ..utils import OUTPUT_ARCS, OUTPUT_KNOTS, OUTPUT_MODES, TENSION_FIELD
+from ..wkb import WKB_MULTIPOLYGON, WKB_POLYGON, WkbBuilder, read_wkb
+from .incremental import SplinesLayerUpdater, tracked_fields
+
+# number of features read from the source and handed over to the workers at once
+CHUNK_SIZE = 1024
+# rings with at least this number of knots are splined block by block straight into the output WKB
+STREAM_KNOTS = 100000
+
+# file of the cache of results, in the QGIS profile directory
+CACHE_FILE = os.path.join("spline", "lines2splines_cache.sqlite")
+
+# marks rings splined by interpolate_stream()
+STREAM_RING = "stream"
+
+# validation modes, in the order of the VALIDATION parameter options
+VALIDATION_NONE = 0
+VALIDATION_FAST = 1
+VALIDATION_GEOS = 2
+
+
+def geometry_wkb(geom):
+    """WKB of geometry, None if it is null."""
+    if geom.isNull():
+        return None
+    return geom.asWkb().data()
+
+
+def geometry_parts(data):
+    """Flat WKB type, has_z, has_m and parts of geometry WKB data, see wkb.read_wkb()."""
+    if data is None:
+        return None, False, False, []
+    return read_wkb(data)
+
+
+def smooth_parts(parts, smoothing, tolerance, closed):
+    """Parts with each ring replaced by the knots of its smoothing spline, with z and m of the kept vertices."""
+    smoothed = []
+    for part in parts:
+        rings = []
+        for ring in part:
+            idx, knots = smooth_knots(ring[:, :2], smoothing, tolerance, closed)
+            rings.append(np.column_stack((knots, ring[idx, 2:])))
+        smoothed.append(rings)
+    return smoothed
+
 
-from ..utils import DEFAULT_TIGHTNESS, DEFAULT_TOLERANCE, DEFAULT_MAX_SEGMENTS, SETTINGS_NAME
+def geometry_from_wkb(data):
+    geom = QgsGeometry()
+    geom.fromWkb(data)
+    return geom
+
+
+def parts_self_intersect(flat_type, parts):
+    """
+    Fast check of spline parts for self-intersections. Lines are checked each separately, all rings of a polygon
+    together, so a ring touching another ring is reported too. Closed lines end where they start, like rings.
+    """
+    if flat_type in (WKB_POLYGON, WKB_MULTIPOLYGON):
+        return any(self_intersects([ring[:, :2] for ring in rings], closed=True) for rings in parts)
+    for rings in parts:
+        line = rings[0][:, :2]
+        if self_intersects([line], closed=len(line) > 3 and np.array_equal(line[0], line[-1])):
+            return True
+    return False
 
 
 class Lines2SplinesProcessingAlgorithm(QgsProcessingAlgorithm):
@@ -49,7 +130,26 @@ class Lines2SplinesProcessingAlgorithm(QgsProcessingAlgorithm):
     TENSION = "TENSION"
     TOLERANCE = "TOLERANCE"
     MAX_SEGMENTS = "MAX_SEGMENTS"
+    ADAPTIVE = "ADAPTIVE"
+    SMOOTHING = "SMOOTHING"
+    WORKERS = "WORKERS"
+    BATCH_SIZE = "BATCH_SIZE"
+    VERBOSE = "VERBOSE"
+    PROFILE = "PROFILE"
+    PROFILE_REPORT = "PROFILE_REPORT"
+    VALIDATION = "VALIDATION"
+    OUTPUT_MODE = "OUTPUT_MODE"
+    USE_CACHE = "USE_CACHE"
+    CACHE_SIZE = "CACHE_SIZE"
+    TRACK_CHANGES = "TRACK_CHANGES"
+    UPDATE_LAYER = "UPDATE_LAYER"
+    DELETE_MISSING = "DELETE_MISSING"
     OUTPUT = "OUTPUT"
+    REJECTED = "REJECTED"
+
+    def __init__(self):
+        super(Lines2SplinesProcessingAlgorithm, self).__init__()
+        self.update_layer_id = None
 
     def tr(self, string):
         """
@@ -82,7 +182,8 @@ class Lines2SplinesProcessingAlgorithm(QgsProcessingAlgorithm):
 
     def shortHelpString(self):
         help_str = """
-        Convert single line geometries to splines (chains of straight lines).
+        Convert line geometries and polygon rings to splines (chains of straight lines).
+        Each part of multi-part geometries is converted separately, attributes are kept.
         
         A modified <a href=https://en.wikipedia.org/wiki/Cubic_Hermite_spline>cubic Hermite spline interpolator</a> is used to obtain continuous piecewise third-degree polynomials between knots (known spline points).
         Each piece is converted to a chain of lines which is then simplified with <a href=https://en.wikipedia.org/wiki/Ramer%E2%80%93Douglas%E2%80%93Peucker_algorithm>Douglas-Peuker algorithm</a>. 
@@ -93,17 +194,36 @@ class Lines2SplinesProcessingAlgorithm(QgsProcessingAlgorithm):
          * Tightness or tension - can be interpreted as the length of the curve tangent at digitized points, must be in interval [0,1]
          * Tolerance for Douglas-Peuker simplification algorithm - the smaller it is, the more segmented is the resulting linestring.
          * Max number of spline segments - initial number of spline segments interpolated between knots. This line is then simplified.
+         * Adaptive number of segments - the number of spline segments between knots is derived from the tolerance, Max number of spline segments is its upper limit. The few samples are simplified the same way.
+         * Smoothing factor - for dense noisy input (GPS tracks, scanned contours): vertices are approximated by a cubic smoothing spline, which is simplified with the tolerance to the knots of the output spline. Noise is averaged over about smoothing<sup>1/4</sup> vertices on each side. 0 interpolates all vertices, knots and tension output ignores it.
+         * Output - lines (vertices of the splines), circular arcs (curved geometries with arcs fitted to the splines within the tolerance, QGIS segmentizes them when drawing) or knots and tension (input geometries with the tension in the spline_tension field).
+         * Number of parallel workers - features are read in chunks and splined by this number of worker threads. Results are written in input order.
+         * Validity check - none, fast check of self-intersections of the spline coordinates (touching rings are rejected too) or full GEOS validity check.
+         * Output batch size - number of features written to the output at once.
+         * Cache results - splines are stored in a cache in the QGIS profile directory and reused in later runs for unchanged geometries and parameters. Hits and misses are logged.
+         * Cache size - when the cache grows over this size in megabytes, the least recently used splines are deleted.
+         * Store source ids and hashes - add spline_src_fid and spline_hash fields to the output, so that it can be updated incrementally later.
+         * Splines layer to update - layer created before with source ids and hashes stored. Only features of added or modified (geometry, attributes or parameters) input features are splined and written to it, features of input features whose new splines are rejected are deleted from it. The Splines layer output gets just the splined features then.
+         * Delete features of missing input features - features of input features which were not read (deleted) are deleted from the splines layer to update. It is not done when only selected features are processed, or the input is limited or filtered otherwise, also by a layer filter.
+         * Log every feature - write id of each processed feature to the log. A summary is logged at the end in any case.
+         * Profile processing stages - log time spent in each stage of the processing (also enabled by SPLINE_PROFILE environment variable). The breakdown can be saved to a JSON profiling report too.
+
+        Lines and rings of 100 000 or more vertices are splined block by block straight into the output geometry, so only the input and output vertices are held in memory.
+
+        Features with invalid splines are written unchanged to the optional Rejected features layer. Without it they are reported in the log and left out.
         """
         return self.tr(help_str)
 
     def initAlgorithm(self, config=None):
-        tension = QSettings().value(SETTINGS_NAME + "/tightness", DEFAULT_TIGHTNESS, float)
-        tolerance = QSettings().value(SETTINGS_NAME + "/tolerance", DEFAULT_TOLERANCE, float)
-        max_segments = QSettings().value(SETTINGS_NAME + "/max_segments", DEFAULT_MAX_SEGMENTS, float)
+        settings = spline_settings()
+        tension = settings.tightness
+        tolerance = settings.tolerance
+        max_segments = settings.max_segments
+        adaptive = settings.adaptive
 
         self.addParameter(
             QgsProcessingParameterFeatureSource(
-                self.INPUT, self.tr("Input layer"), [QgsProcessing.TypeVectorLine]
+                self.INPUT, self.tr("Input layer"), [QgsProcessing.TypeVectorLine, QgsProcessing.TypeVectorPolygon]
             )
         )
         self.addParameter(
@@ -130,22 +250,165 @@ class Lines2SplinesProcessingAlgorithm(QgsProcessingAlgorithm):
                 max_segments,
             )
         )
+        self.addParameter(
+            QgsProcessingParameterBoolean(
+                self.ADAPTIVE,
+                self.tr("Adaptive number of spline segments between vertices"),
+                adaptive,
+            )
+        )
+        self.addParameter(
+            QgsProcessingParameterNumber(
+                self.SMOOTHING,
+                self.tr("Smoothing factor (0 - no smoothing)"),
+                QgsProcessingParameterNumber.Double,
+                0.0,
+                minValue=0.0,
+            )
+        )
+        self.addParameter(
+            QgsProcessingParameterEnum(
+                self.OUTPUT_MODE,
+                self.tr("Output"),
+                [self.tr(mode) for mode in OUTPUT_MODES],
+                defaultValue=settings.output_mode,
+            )
+        )
+        self.addParameter(
+            QgsProcessingParameterEnum(
+                self.VALIDATION,
+                self.tr("Validity check"),
+                [
+                    self.tr("No validation"),
+                    self.tr("Fast self-intersection check"),
+                    self.tr("Full GEOS validity check"),
+                ],
+                defaultValue=VALIDATION_GEOS,
+            )
+        )
+        workers_param = QgsProcessingParameterNumber(
+            self.WORKERS,
+            self.tr("Number of parallel workers"),
+            QgsProcessingParameterNumber.Integer,
+            1,
+            minValue=1,
+            maxValue=max(QThread.idealThreadCount(), 1),
+        )
+        workers_param.setFlags(workers_param.flags() | QgsProcessingParameterDefinition.FlagAdvanced)
+        self.addParameter(workers_param)
+        batch_size_param = QgsProcessingParameterNumber(
+            self.BATCH_SIZE,
+            self.tr("Output batch size"),
+            QgsProcessingParameterNumber.Integer,
+            1000,
+            minValue=1,
+        )
+        batch_size_param.setFlags(batch_size_param.flags() | QgsProcessingParameterDefinition.FlagAdvanced)
+        self.addParameter(batch_size_param)
+        use_cache_param = QgsProcessingParameterBoolean(
+            self.USE_CACHE,
+            self.tr("Cache results"),
+            False,
+        )
+        use_cache_param.setFlags(use_cache_param.flags() | QgsProcessingParameterDefinition.FlagAdvanced)
+        self.addParameter(use_cache_param)
+        cache_size_param = QgsProcessingParameterNumber(
+            self.CACHE_SIZE,
+            self.tr("Cache size (MB)"),
+            QgsProcessingParameterNumber.Integer,
+            512,
+            minValue=1,
+        )
+        cache_size_param.setFlags(cache_size_param.flags() | QgsProcessingParameterDefinition.FlagAdvanced)
+        self.addParameter(cache_size_param)
+        track_param = QgsProcessingParameterBoolean(
+            self.TRACK_CHANGES,
+            self.tr("Store source ids and hashes for incremental updates"),
+            False,
+        )
+        track_param.setFlags(track_param.flags() | QgsProcessingParameterDefinition.FlagAdvanced)
+        self.addParameter(track_param)
+        update_layer_param = QgsProcessingParameterVectorLayer(
+            self.UPDATE_LAYER,
+            self.tr("Splines layer to update"),
+            [QgsProcessing.TypeVectorLine, QgsProcessing.TypeVectorPolygon],
+            optional=True,
+        )
+        update_layer_param.setFlags(update_layer_param.flags() | QgsProcessingParameterDefinition.FlagAdvanced)
+        self.addParameter(update_layer_param)
+        delete_missing_param = QgsProcessingParameterBoolean(
+            self.DELETE_MISSING,
+            self.tr("Delete features of missing input features from the splines layer to update"),
+            True,
+        )
+        delete_missing_param.setFlags(delete_missing_param.flags() | QgsProcessingParameterDefinition.FlagAdvanced)
+        self.addParameter(delete_missing_param)
+        verbose_param = QgsProcessingParameterBoolean(
+            self.VERBOSE,
+            self.tr("Log every feature"),
+            False,
+        )
+        verbose_param.setFlags(verbose_param.flags() | QgsProcessingParameterDefinition.FlagAdvanced)
+        self.addParameter(verbose_param)
+        profile_param = QgsProcessingParameterBoolean(
+            self.PROFILE,
+            self.tr("Profile processing stages"),
+            False,
+        )
+        profile_param.setFlags(profile_param.flags() | QgsProcessingParameterDefinition.FlagAdvanced)
+        self.addParameter(profile_param)
         self.addParameter(QgsProcessingParameterFeatureSink(self.OUTPUT, self.tr("Splines layer")))
+        self.addParameter(
+            QgsProcessingParameterFeatureSink(
+                self.REJECTED, self.tr("Rejected features"), optional=True, createByDefault=False
+            )
+        )
+        self.addParameter(
+            QgsProcessingParameterFileDestination(
+                self.PROFILE_REPORT,
+                self.tr("Profiling report"),
+                self.tr("JSON files (*.json)"),
+                optional=True,
+                createByDefault=False,
+            )
+        )
 
     def processAlgorithm(self, parameters, context, feedback):
         source = self.parameterAsSource(parameters, self.INPUT, context)
         if source is None:
             raise QgsProcessingException(self.invalidSourceError(parameters, self.INPUT))
-        # Check if the input layer is single type geometry
-        if source.wkbType() not in SINGLE_LINE_TYPES:
-            raise QgsProcessingException(
-                "Wrong input geometry type (multi). Convert it to single type and try again.")
+        wkb_type = source.wkbType()
+        if QgsWkbTypes.isCurvedType(wkb_type):
+            raise QgsProcessingException("Curved input geometries are not supported. Segmentize them and try again.")
 
+        output_mode = self.parameterAsEnum(parameters, self.OUTPUT_MODE, context)
+        update_layer = self.parameterAsVectorLayer(parameters, self.UPDATE_LAYER, context)
+        tracking = update_layer is not None or self.parameterAsBoolean(parameters, self.TRACK_CHANGES, context)
+        # features left out of a subset of the input (also a layer filter) are not deleted input features
+        input_definition = parameters.get(self.INPUT)
+        input_layer = self.parameterAsVectorLayer(parameters, self.INPUT, context)
+        input_subset = isinstance(input_definition, QgsProcessingFeatureSourceDefinition) and bool(
+            input_definition.selectedFeaturesOnly
+            or input_definition.featureLimit >= 0
+            or getattr(input_definition, "filterExpression", "")
+        )
+        input_subset = input_subset or bool(input_layer is not None and input_layer.subsetString())
+        delete_missing = self.parameterAsBoolean(parameters, self.DELETE_MISSING, context) and not input_subset
+        out_fields = source.fields()
+        if output_mode == OUTPUT_KNOTS:
+            out_fields = QgsFields(out_fields)
+            out_fields.append(QgsField(TENSION_FIELD, QVariant.Double))
+        if tracking:
+            out_fields = tracked_fields(out_fields)
+        out_wkb_type = QgsWkbTypes.curveType(wkb_type) if output_mode == OUTPUT_ARCS else wkb_type
         (sink, dest_id) = self.parameterAsSink(
-            parameters, self.OUTPUT, context, source.fields(), source.wkbType(), source.sourceCrs()
+            parameters, self.OUTPUT, context, out_fields, out_wkb_type, source.sourceCrs()
         )
         if sink is None:
             raise QgsProcessingException(self.invalidSinkError(parameters, self.OUTPUT))
+        (rejected_sink, rejected_id) = self.parameterAsSink(
+            parameters, self.REJECTED, context, source.fields(), wkb_type, source.sourceCrs()
+        )
 
         tension = self.parameterAsDouble(
             parameters,
@@ -162,72 +425,397 @@ class Lines2SplinesProcessingAlgorithm(QgsProcessingAlgorithm):
             self.MAX_SEGMENTS,
             context,
         )
-        has_z = source.wkbType() in (
-            QgsWkbTypes.LineStringZ,
-            QgsWkbTypes.LineStringZM,
+        adaptive = self.parameterAsBoolean(
+            parameters,
+            self.ADAPTIVE,
+            context,
         )
-        has_m = source.wkbType() in (
-            QgsWkbTypes.LineStringM,
-            QgsWkbTypes.LineStringZM,
+        smoothing = self.parameterAsDouble(
+            parameters,
+            self.SMOOTHING,
+            context,
+        )
+        workers = self.parameterAsInt(
+            parameters,
+            self.WORKERS,
+            context,
+        )
+        batch_size = self.parameterAsInt(
+            parameters,
+            self.BATCH_SIZE,
+            context,
+        )
+        validation = self.parameterAsEnum(
+            parameters,
+            self.VALIDATION,
+            context,
+        )
+        use_cache = self.parameterAsBoolean(
+            parameters,
+            self.USE_CACHE,
+            context,
+        )
+        cache_size = self.parameterAsInt(
+            parameters,
+            self.CACHE_SIZE,
+            context,
+        )
+        verbose = self.parameterAsBoolean(
+            parameters,
+            self.VERBOSE,
+            context,
+        )
+        profile = self.parameterAsBoolean(
+            parameters,
+            self.PROFILE,
+            context,
+        ) or bool(os.environ.get(PROFILE_ENV))
+        profile_report = self.parameterAsFileOutput(
+            parameters,
+            self.PROFILE_REPORT,
+            context,
         )
+        has_z = QgsWkbTypes.hasZ(wkb_type)
+        has_m = QgsWkbTypes.hasM(wkb_type)
+        is_polygon = QgsWkbTypes.geometryType(wkb_type) == QgsWkbTypes.PolygonGeometry
 
         total = 100.0 / source.featureCount() if source.featureCount() else 0
         features = source.getFeatures()
 
-        for current, feature in enumerate(features):
-            if feedback.isCanceled():
-                break
-            feedback.pushInfo(f"\nFeature id={feature.id()}")
-            cur_geom = feature.geometry()
-
-            vertices_xy = [QgsPointXY(v) for v in cur_geom.vertices()]
-            if len(vertices_xy) < 3:
-                # it is a 2 points line - keep it as is
-                sink.addFeature(feature, QgsFeatureSink.FastInsert)
-                continue
-            spline_pts = [QgsPointXY(pt) for pt in interpolate(vertices_xy, tolerance, tension, max_segments)]
-            spline_geom = QgsGeometry.fromPolylineXY(spline_pts)
-            if not spline_geom.isGeosValid():
-                raise QgsProcessingException(f"Invalid resulting spline geometry for feature id {feature.id()}")
-
-            # linearly interpolate m and z values, if applicable
-            if has_m:
-                m_pts = [
-                    QgsPointXY(spline_geom.lineLocatePoint(QgsGeometry.fromPointXY(QgsPointXY(v))), v.m())
-                    for v in cur_geom.vertices()
-                ]
-                m_line = QgsGeometry.fromPolylineXY(m_pts)
-                if not m_line.isGeosValid():
-                    feedback.pushInfo("Invalid m data")
-                    has_m = False
-            if has_z:
-                z_pts = [
-                    QgsPointXY(spline_geom.lineLocatePoint(QgsGeometry.fromPointXY(QgsPointXY(v))), v.z())
-                    for v in cur_geom.vertices()
+        # cached splines are keyed by input WKB, these parameters and has_z and has_m (z and m are dropped if invalid)
+        cache_params = (tension, tolerance, max_segments, adaptive, is_polygon, validation, output_mode, smoothing)
+        arcs = output_mode == OUTPUT_ARCS
+        # arcs are fitted to lines of 2 knots too (straight arcs), so that all output geometries are curved
+        min_knots = 2 if arcs else 3
+        stream_knots = np.inf if arcs else STREAM_KNOTS
+
+        def job_rings(parts):
+            # rings splined by the workers
+            return [ring[:, :2] for part in parts for ring in part if min_knots <= len(ring) < stream_knots]
+
+        def spline_job(rings):
+            if arcs:
+                # vertices, knot indices and straight arcs mask of each ring
+                return [interpolate_arcs(ring, tolerance, tension, max_segments, is_polygon) for ring in rings]
+            # all rings in one interpolate_many() call, returns spline and knot indices of each ring (no arcs)
+            offsets = np.cumsum([0] + [len(ring) for ring in rings])
+            coords = np.concatenate(rings) if rings else np.empty((0, 2))
+            result, result_offsets, knots = interpolate_many(
+                coords, offsets, tolerance, tension, max_segments, adaptive, is_polygon, return_knots=True
+            )
+            starts, ends = result_offsets[:-1], result_offsets[1:]
+            return [
+                (result[starts[i] : ends[i]], knots[offsets[i] : offsets[i + 1]] - starts[i], None)
+                for i in range(len(rings))
+            ]
+
+        updater = None
+        if update_layer is not None:
+            if update_layer.providerType() == "memory":
+                raise QgsProcessingException(
+                    "Memory layers cannot be updated. Use a layer stored in a file or database."
+                )
+            # own instance of the layer, the project one belongs to the main thread and is reloaded when finished
+            self.update_layer_id = update_layer.id()
+            updater = SplinesLayerUpdater(
+                QgsVectorLayer(update_layer.source(), update_layer.name(), update_layer.providerType()), out_fields
+            )
+
+        def output_feature(feature, geom, feature_hash):
+            out_feature = QgsFeature(feature)
+            out_feature.setGeometry(geom)
+            values = [tension] if output_mode == OUTPUT_KNOTS else []
+            if tracking:
+                values += [feature.id(), feature_hash]
+            if values:
+                out_feature.setFields(out_fields, False)
+                out_feature.setAttributes(feature.attributes() + values)
+            return out_feature
+
+        out_features = []
+
+        def flush():
+            with profiler.stage("sink write", len(out_features)):
+                sink.addFeatures(out_features, QgsFeatureSink.FastInsert)
+                if updater is not None:
+                    updater.write(out_features)
+            out_features.clear()
+
+        profiler_enabled = profiler.enabled
+        profiler.enabled = profile
+        profiler.reset()
+        executor = ThreadPoolExecutor(max_workers=workers) if workers > 1 else None
+        cache = None
+        if use_cache:
+            cache = ResultCache(os.path.join(QgsApplication.qgisSettingsDirPath(), CACHE_FILE), cache_size * 1000000)
+        cache_hits = 0
+        cache_misses = 0
+        current = 0
+        skipped = 0
+        rejected = 0
+        vertices_in = 0
+        vertices_out = 0
+        try:
+            while not feedback.isCanceled():
+                # read a chunk of features, spline all their parts in the worker pool and write them in input order
+                with profiler.stage("read features"):
+                    chunk = list(islice(features, CHUNK_SIZE))
+                    chunk_wkbs = [geometry_wkb(feature.geometry()) for feature in chunk]
+                    chunk_geoms = [geometry_parts(data) for data in chunk_wkbs]
+                if not chunk:
+                    break
+                chunk_hashes = [None] * len(chunk)
+                if tracking:
+                    chunk_hashes = [
+                        cache_key(data or b"", cache_params + (repr(feature.attributes()),)).hex()
+                        for feature, data in zip(chunk, chunk_wkbs)
+                    ]
+                if updater is not None:
+                    # only added and modified features are splined
+                    changed = [
+                        i
+                        for i, (feature, feature_hash) in enumerate(zip(chunk, chunk_hashes))
+                        if not updater.is_unchanged(feature.id(), feature_hash)
+                    ]
+                    current += len(chunk) - len(changed)
+                    chunk, chunk_wkbs, chunk_geoms, chunk_hashes = (
+                        [items[i] for i in changed] for items in (chunk, chunk_wkbs, chunk_geoms, chunk_hashes)
+                    )
+                if output_mode == OUTPUT_KNOTS:
+                    # the knots are written as they are, with the tension
+                    for feature, feature_hash in zip(chunk, chunk_hashes):
+                        current += 1
+                        out_features.append(output_feature(feature, feature.geometry(), feature_hash))
+                        if len(out_features) >= batch_size:
+                            flush()
+                    vertices = sum(len(ring) for geom in chunk_geoms for part in geom[3] for ring in part)
+                    vertices_in += vertices
+                    vertices_out += vertices
+                    feedback.setProgress(int(current * total))
+                    continue
+                # cached features are not splined again
+                cached = {}
+                cache_zm = (has_z, has_m)
+                keys = [None] * len(chunk)
+                if cache is not None:
+                    with profiler.stage("cache lookup", len(chunk)):
+                        keys = [cache_key(data, cache_params + cache_zm) if data else None for data in chunk_wkbs]
+                        cached = cache.get_many([key for key in keys if key])
+                chunk_vertices = [sum(len(ring) for part in geom[3] for ring in part) for geom in chunk_geoms]
+                if smoothing > 0:
+                    # rings are replaced by the knots of their smoothing splines, which are splined then
+                    with profiler.stage("smooth knots", len(chunk)):
+                        chunk_geoms = [
+                            geom
+                            if key in cached
+                            else geom[:3] + (smooth_parts(geom[3], smoothing, tolerance, is_polygon),)
+                            for key, geom in zip(keys, chunk_geoms)
+                        ]
+                cache_store = []
+                rings = [
+                    ring for key, geom in zip(keys, chunk_geoms) if key not in cached for ring in job_rings(geom[3])
                 ]
-                z_line = QgsGeometry.fromPolylineXY(z_pts)
-                if not z_line.isGeosValid():
-                    feedback.pushInfo("Invalid z data")
-                    has_z = False
-
-            if has_m or has_z:
-                new_vertices = []
-                for vertex in spline_geom.vertices():
-                    dist = spline_geom.lineLocatePoint(QgsGeometry.fromPointXY(QgsPointXY(vertex)))
-                    if has_m:
-                        m_line_pt = m_line.interpolate(dist)
-                        if m_line_pt.isGeosValid():
-                            vertex.addMValue(m_line_pt.asPoint().y())
-                    if has_z:
-                        z_line_pt = z_line.interpolate(dist).asPoint()
-                        vertex.addZValue(z_line_pt.y())
-                    new_vertices.append(vertex)
-                spline_geom = QgsGeometry.fromPolyline(new_vertices)
-
-            spline_feat = QgsFeature(feature)
-            spline_feat.setGeometry(spline_geom)
-            sink.addFeature(spline_feat, QgsFeatureSink.FastInsert)
-
-            feedback.setProgress(int(current * total))
-
-        return {self.OUTPUT: dest_id}
+                # each worker gets a contiguous share of the rings
+                bounds = np.linspace(0, len(rings), workers + 1).astype(int)
+                jobs = [rings[start:end] for start, end in zip(bounds[:-1], bounds[1:])]
+                results = chain.from_iterable(executor.map(spline_job, jobs) if executor else map(spline_job, jobs))
+
+                for feature, data, feature_hash, key, feature_vertices, (flat_type, geom_z, geom_m, parts) in zip(
+                    chunk, chunk_wkbs, chunk_hashes, keys, chunk_vertices, chunk_geoms
+                ):
+                    if feedback.isCanceled():
+                        break
+                    current += 1
+                    if verbose:
+                        feedback.pushInfo(f"\nFeature id={feature.id()}")
+                    vertices_in += feature_vertices
+                    if not any(len(ring) >= min_knots for part in parts for ring in part):
+                        # only 2 points lines - keep it as is
+                        skipped += 1
+                        vertices_out += feature_vertices
+                        out_features.append(output_feature(feature, feature.geometry(), feature_hash))
+                        if len(out_features) >= batch_size:
+                            flush()
+                        continue
+
+                    feature_results = results
+                    if key in cached:
+                        if (has_z, has_m) == cache_zm:
+                            cache_hits += 1
+                            spline_geom = geometry_from_wkb(cached[key])
+                            if arcs:
+                                vertices_out += spline_geom.constGet().nCoordinates()
+                            else:
+                                vertices_out += sum(len(ring) for part in read_wkb(cached[key])[3] for ring in part)
+                            out_features.append(output_feature(feature, spline_geom, feature_hash))
+                            if len(out_features) >= batch_size:
+                                flush()
+                            feedback.setProgress(int(current * total))
+                            continue
+                        # z or m were dropped since the lookup, the cached spline does not apply, it is splined here
+                        if smoothing > 0:
+                            parts = smooth_parts(parts, smoothing, tolerance, is_polygon)
+                        feature_results = iter(spline_job(job_rings(parts)))
+                    if cache is not None:
+                        cache_misses += 1
+                    feature_zm = (has_z, has_m)
+
+                    # columns of z and m values in vertex arrays
+                    z_col = 2 if geom_z else None
+                    m_col = 2 + geom_z if geom_m else None
+                    splines = []
+                    for part in parts:
+                        part_splines = []
+                        for ring in part:
+                            if len(ring) < min_knots:
+                                part_splines.append(None)
+                                continue
+                            if len(ring) < stream_knots:
+                                with profiler.stage("spline"):
+                                    spline_xy, knots, straight = next(feature_results)
+                                # distances of spline vertices and of the knots along the spline
+                                spline_dist = cumulative_length(spline_xy) if geom_z or geom_m else None
+                                knot_dist = spline_dist[knots] if spline_dist is not None else None
+                                m_valid = not has_m or m_col is None or values_line_is_valid(knot_dist, ring[:, m_col])
+                                z_valid = not has_z or z_col is None or values_line_is_valid(knot_dist, ring[:, z_col])
+                                part_splines.append((spline_xy, spline_dist, knot_dist, straight))
+                            else:
+                                # huge ring, it is splined while the geometry is built
+                                xy = ring[:, :2]
+                                m_valid = not has_m or m_col is None or knot_values_are_valid(xy, ring[:, m_col])
+                                z_valid = not has_z or z_col is None or knot_values_are_valid(xy, ring[:, z_col])
+                                part_splines.append(STREAM_RING)
+                            if not m_valid:
+                                feedback.pushInfo("Invalid m data")
+                                has_m = False
+                            if not z_valid:
+                                feedback.pushInfo("Invalid z data")
+                                has_z = False
+                        splines.append(part_splines)
+
+                    # linearly interpolate m and z values, if applicable
+                    out_z = has_z and geom_z
+                    out_m = has_m and geom_m
+                    columns = [0, 1] + ([z_col] if out_z else []) + ([m_col] if out_m else [])
+                    with profiler.stage("z/m interpolation"):
+                        spline_parts = []
+                        for part, part_splines in zip(parts, splines):
+                            spline_rings = []
+                            for ring, spline in zip(part, part_splines):
+                                if spline is None:
+                                    # degenerate ring, written as it is (an arcs ring without arcs)
+                                    spline_rings.append((ring[:, columns], np.zeros(0, dtype=bool) if arcs else None))
+                                elif spline is STREAM_RING:
+                                    stream = interpolate_stream(
+                                        ring[:, :2],
+                                        tolerance,
+                                        tension,
+                                        max_segments,
+                                        adaptive,
+                                        is_polygon,
+                                        ring[:, columns[2:]],
+                                    )
+                                    spline_rings.append((stream, None))
+                                else:
+                                    spline_xy, spline_dist, knot_dist, straight = spline
+                                    values = [
+                                        interpolate_values(spline_dist, knot_dist, ring[:, col]) for col in columns[2:]
+                                    ]
+                                    spline_rings.append((np.column_stack([spline_xy] + values), straight))
+                            spline_parts.append(spline_rings)
+
+                    # streamed rings are splined here, block by block
+                    with profiler.stage("build geometry"):
+                        builder = WkbBuilder(flat_type, out_z, out_m, len(spline_parts), curved=arcs)
+                        for spline_rings in spline_parts:
+                            builder.begin_part(len(spline_rings))
+                            for spline_ring, straight in spline_rings:
+                                if arcs:
+                                    builder.add_arcs(spline_ring, straight)
+                                    continue
+                                builder.begin_ring()
+                                for block in [spline_ring] if isinstance(spline_ring, np.ndarray) else spline_ring:
+                                    builder.add_vertices(block)
+                                builder.end_ring()
+                        spline_wkb = builder.wkb()
+                        spline_geom = geometry_from_wkb(spline_wkb)
+                    with profiler.stage("validity check"):
+                        if validation == VALIDATION_FAST and arcs:
+                            # lines through the arc vertices approximate the arcs
+                            arc_parts = [[ring for ring, _ in spline_rings] for spline_rings in spline_parts]
+                            is_valid = not parts_self_intersect(flat_type, arc_parts)
+                        elif validation == VALIDATION_FAST:
+                            is_valid = not parts_self_intersect(flat_type, read_wkb(spline_wkb)[3])
+                        elif validation == VALIDATION_GEOS:
+                            is_valid = spline_geom.isGeosValid()
+                        else:
+                            is_valid = True
+                    if not is_valid:
+                        rejected += 1
+                        if updater is not None:
+                            # the spline of the previous geometry is outdated
+                            updater.reject(feature.id())
+                        if rejected_sink is not None:
+                            rejected_sink.addFeature(feature, QgsFeatureSink.FastInsert)
+                        else:
+                            feedback.reportError(
+                                self.tr("Invalid resulting spline geometry for feature id {}").format(feature.id())
+                            )
+                        feedback.setProgress(int(current * total))
+                        continue
+
+                    vertices_out += builder.vertices
+                    if cache is not None and data and (has_z, has_m) == feature_zm:
+                        cache_store.append((cache_key(data, cache_params + feature_zm), spline_wkb))
+                    out_features.append(output_feature(feature, spline_geom, feature_hash))
+                    if len(out_features) >= batch_size:
+                        flush()
+
+                    feedback.setProgress(int(current * total))
+                if cache_store:
+                    with profiler.stage("cache store", len(cache_store)):
+                        cache.put_many(cache_store)
+            flush()
+            if updater is not None:
+                updater.delete_stale(unseen=delete_missing and not feedback.isCanceled())
+        finally:
+            if executor:
+                executor.shutdown(wait=True)
+            if cache is not None:
+                cache.close()
+            profiler.enabled = profiler_enabled
+
+        feedback.pushInfo(
+            self.tr(
+                "Features processed: {}, vertices in: {}, vertices out: {}, "
+                "features skipped (less than 3 vertices): {}, features rejected (invalid spline): {}"
+            ).format(current, vertices_in, vertices_out, skipped, rejected)
+        )
+
+        if cache is not None:
+            feedback.pushInfo(self.tr("Cache hits: {}, misses: {}").format(cache_hits, cache_misses))
+        if updater is not None:
+            feedback.pushInfo(
+                self.tr("Splines layer updated, unchanged: {}, modified: {}, added: {}, deleted: {}").format(
+                    updater.unchanged, updater.modified, updater.added, updater.deleted
+                )
+            )
+
+        outputs = {self.OUTPUT: dest_id}
+        if rejected_sink is not None:
+            outputs[self.REJECTED] = rejected_id
+        if profile:
+            feedback.pushInfo(self.tr("Time spent in processing stages:\n{}").format(profiler.report()))
+            if profile_report:
+                profiler.write_json(profile_report)
+                outputs[self.PROFILE_REPORT] = profile_report
+        return outputs
+
+    def postProcessAlgorithm(self, context, feedback):
+        if self.update_layer_id is not None:
+            # the layer was changed through another instance
+            layer = QgsProcessingUtils.mapLayerFromString(self.update_layer_id, context)
+            if layer is not None:
+                layer.reload()
+                layer.triggerRepaint()
+        return {}
@@ -0,0 +1,100 @@
+"""
+/***************************************************************************
+    Cumulative timers and counters of interpolation stages
+                              -------------------
+        begin                : October 2026
+        copyright            : (C) 2026 by the Spline plugin contributors
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+
+Profiling is enabled by SPLINE_PROFILE environment variable (any non-empty value) or by the Processing
+algorithm parameter. When disabled, profiler.stage() returns a shared no-op context manager.
+"""
+import json
+import os
+import threading
+import time
+
+PROFILE_ENV = "SPLINE_PROFILE"
+
+
+class Profiler(object):
+    def __init__(self):
+        self.enabled = bool(os.environ.get(PROFILE_ENV))
+        self.lock = threading.Lock()
+        self.times = {}
+        self.counts = {}
+
+    def reset(self):
+        with self.lock:
+            self.times = {}
+            self.counts = {}
+
+    def stage(self, name, count=1):
+        """Context manager adding its run time and count to stage name."""
+        if not self.enabled:
+            return NULL_STAGE
+        return _Stage(self, name, count)
+
+    def add(self, name, seconds, count=1):
+        with self.lock:
+            self.times[name] = self.times.get(name, 0.0) + seconds
+            self.counts[name] = self.counts.get(name, 0) + count
+
+    def results(self):
+        """List of (stage, seconds, count) sorted by time, slowest first."""
+        with self.lock:
+            rows = [(name, seconds, self.counts[name]) for name, seconds in self.times.items()]
+        return sorted(rows, key=lambda row: row[1], reverse=True)
+
+    def report(self):
+        """Text table of stages."""
+        lines = ["{:<30} {:>12} {:>12}".format("stage", "seconds", "count")]
+        for name, seconds, count in self.results():
+            lines.append("{:<30} {:>12.4f} {:>12}".format(name, seconds, count))
+        return "\n".join(lines)
+
+    def write_json(self, path):
+        data = [{"stage": name, "seconds": seconds, "count": count} for name, seconds, count in self.results()]
+        with open(path, "w") as f:
+            json.dump(data, f, indent=1)
+
+
+class _Stage(object):
+    __slots__ = ("profiler", "name", "count", "start")
+
+    def __init__(self, profiler, name, count):
+        self.profiler = profiler
+        self.name = name
+        self.count = count
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *args):
+        self.profiler.add(self.name, time.perf_counter() - self.start, self.count)
+        return False
+
+
+class _NullStage(object):
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+
+NULL_STAGE = _NullStage()
+
+profiler = Profiler()
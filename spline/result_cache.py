@@ -0,0 +1,105 @@
+"""
+/***************************************************************************
+    On-disk cache of spline geometries for repeated Processing runs
+                              -------------------
+        begin                : October 2026
+        copyright            : (C) 2026 by the Spline plugin contributors
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+
+Output WKB is stored in SQLite under the SHA-1 of the input WKB and of the parameters. When the cache grows over
+its size limit, the least recently used results are deleted.
+"""
+import hashlib
+import os
+import sqlite3
+import time
+
+# bump when the spline output changes, so that old results are not reused
+CACHE_VERSION = 1
+# keys looked up in one query, below the SQLite limit of query parameters
+QUERY_KEYS = 500
+# value of PRAGMA auto_vacuum for incremental vacuum
+AUTO_VACUUM_INCREMENTAL = 2
+
+
+def cache_key(wkb, params):
+    """Key of input geometry WKB splined with params (tuple of numbers and booleans)."""
+    digest = hashlib.sha1(wkb)
+    digest.update(repr((CACHE_VERSION,) + tuple(params)).encode())
+    return digest.digest()
+
+
+class ResultCache(object):
+    def __init__(self, path, max_bytes):
+        self.max_bytes = max_bytes
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.db = sqlite3.connect(path)
+        # pages of deleted results are given back to the file system, see evict()
+        if self.db.execute("PRAGMA auto_vacuum").fetchone()[0] != AUTO_VACUUM_INCREMENTAL:
+            self.db.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            # an existing file is converted by rebuilding it, once
+            self.db.execute("VACUUM")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS results (key BLOB PRIMARY KEY, wkb BLOB NOT NULL, size INTEGER NOT NULL, "
+            "used REAL NOT NULL)"
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS results_used ON results (used)")
+
+    def get_many(self, keys):
+        """Dictionary of cached WKB of those keys which are in the cache."""
+        found = {}
+        keys = list(set(keys))
+        for start in range(0, len(keys), QUERY_KEYS):
+            batch = keys[start : start + QUERY_KEYS]
+            query = "SELECT key, wkb FROM results WHERE key IN ({})".format(",".join("?" * len(batch)))
+            found.update((bytes(key), bytes(wkb)) for key, wkb in self.db.execute(query, batch))
+        now = time.time()
+        self.db.executemany("UPDATE results SET used = ? WHERE key = ?", [(now, key) for key in found])
+        return found
+
+    def put_many(self, items):
+        """Stores (key, WKB) items."""
+        now = time.time()
+        self.db.executemany(
+            "INSERT OR REPLACE INTO results (key, wkb, size, used) VALUES (?, ?, ?, ?)",
+            [(key, wkb, len(key) + len(wkb), now) for key, wkb in items],
+        )
+
+    def file_size(self):
+        """Bytes of the pages in use, the size of the file once free pages are vacuumed."""
+        (page_size,) = self.db.execute("PRAGMA page_size").fetchone()
+        (page_count,) = self.db.execute("PRAGMA page_count").fetchone()
+        (free_pages,) = self.db.execute("PRAGMA freelist_count").fetchone()
+        return (page_count - free_pages) * page_size
+
+    def evict(self):
+        """
+        Deletes least recently used results until the cache file fits into max_bytes and shrinks the file.
+        Sizes of the results are scaled by the overhead of pages and the index in the file.
+        """
+        (total,) = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()
+        limit = self.max_bytes * min(float(total) / max(self.file_size(), 1), 1.0)
+        if total > limit:
+            delete = []
+            for key, size in self.db.execute("SELECT key, size FROM results ORDER BY used"):
+                delete.append((key,))
+                total -= size
+                if total <= limit:
+                    break
+            self.db.executemany("DELETE FROM results WHERE key = ?", delete)
+        self.db.commit()
+        # execute() would step the pragma once, freeing one page - executescript() runs it to the end
+        self.db.executescript("PRAGMA incremental_vacuum;")
+
+    def close(self):
+        self.evict()
+        self.db.close()
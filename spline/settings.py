@@ -0,0 +1,61 @@
+"""
+/***************************************************************************
+    In-memory snapshot of the plugin settings
+                              -------------------
+        begin                : October 2026
+        copyright            : (C) 2026 by the Spline plugin contributors
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+from qgis.PyQt.QtCore import QSettings
+
+from .utils import (
+    DEFAULT_ADAPTIVE,
+    DEFAULT_MAX_SEGMENTS,
+    DEFAULT_OUTPUT_MODE,
+    DEFAULT_TIGHTNESS,
+    DEFAULT_TOLERANCE,
+    SETTINGS_NAME,
+)
+
+
+class SplineSettings(object):
+    """
+    Plugin settings kept in memory, so that QSettings are not read on every interpolation.
+    They are read on first use and again by load() when the settings dialog changes them.
+    """
+
+    def __init__(self):
+        self.loaded = False
+        self.tolerance = DEFAULT_TOLERANCE
+        self.tightness = DEFAULT_TIGHTNESS
+        self.max_segments = DEFAULT_MAX_SEGMENTS
+        self.adaptive = DEFAULT_ADAPTIVE
+        self.output_mode = DEFAULT_OUTPUT_MODE
+
+    def load(self):
+        settings = QSettings()
+        self.tolerance = settings.value(SETTINGS_NAME + "/tolerance", DEFAULT_TOLERANCE, float)
+        self.tightness = settings.value(SETTINGS_NAME + "/tightness", DEFAULT_TIGHTNESS, float)
+        self.max_segments = settings.value(SETTINGS_NAME + "/max_segments", DEFAULT_MAX_SEGMENTS, int)
+        self.adaptive = settings.value(SETTINGS_NAME + "/adaptive", DEFAULT_ADAPTIVE, bool)
+        self.output_mode = settings.value(SETTINGS_NAME + "/output_mode", DEFAULT_OUTPUT_MODE, int)
+        self.loaded = True
+
+
+_settings = SplineSettings()
+
+
+def spline_settings():
+    """Returns the settings snapshot, loaded from QSettings on first use."""
+    if not _settings.loaded:
+        _settings.load()
+    return _settings
@@ -21,7 +21,15 @@ from qgis.PyQt import uic
 from qgis.PyQt.QtCore import Qt, pyqtSignal, QSettings
 from qgis.PyQt.QtWidgets import QDialogButtonBox
 
-from .utils import DEFAULT_TIGHTNESS, DEFAULT_TOLERANCE, DEFAULT_MAX_SEGMENTS, SETTINGS_NAME
+from .utils import (
+    DEFAULT_ADAPTIVE,
+    DEFAULT_MAX_SEGMENTS,
+    DEFAULT_OUTPUT_MODE,
+    DEFAULT_TIGHTNESS,
+    DEFAULT_TOLERANCE,
+    OUTPUT_MODES,
+    SETTINGS_NAME,
+)
 
 base_dir = os.path.dirname(__file__)
 uicls_log, basecls_log = uic.loadUiType(os.path.join(base_dir, "ui_settingsdialog.ui"))
@@ -45,6 +53,13 @@ class SettingsDialog(uicls_log, basecls_log):
         self.max_segments = QSettings().value(SETTINGS_NAME + "/max_segments", DEFAULT_MAX_SEGMENTS, int)
         self.max_segments_nr_sbox.setValue(self.max_segments)
 
+        self.adaptive = QSettings().value(SETTINGS_NAME + "/adaptive", DEFAULT_ADAPTIVE, bool)
+        self.adaptiveCheckBox.setChecked(self.adaptive)
+
+        self.outputModeComboBox.addItems(OUTPUT_MODES)
+        self.output_mode = QSettings().value(SETTINGS_NAME + "/output_mode", DEFAULT_OUTPUT_MODE, int)
+        self.outputModeComboBox.setCurrentIndex(self.output_mode)
+
         self.buttonBox.button(QDialogButtonBox.Ok).clicked.connect(self.ok)
         self.buttonBox.button(QDialogButtonBox.Cancel).clicked.connect(self.cancel)
         self.buttonBox.button(QDialogButtonBox.RestoreDefaults).clicked.connect(self.defaults)
@@ -58,6 +73,8 @@ class SettingsDialog(uicls_log, basecls_log):
         QSettings().setValue(SETTINGS_NAME + "/tightness", self.splineTightnessSpinBox.value())
         QSettings().setValue(SETTINGS_NAME + "/tolerance", self.splineToleranceSpinBox.value())
         QSettings().setValue(SETTINGS_NAME + "/max_segments", self.max_segments_nr_sbox.value())
+        QSettings().setValue(SETTINGS_NAME + "/adaptive", self.adaptiveCheckBox.isChecked())
+        QSettings().setValue(SETTINGS_NAME + "/output_mode", self.outputModeComboBox.currentIndex())
         self.changed.emit()
 
     def cancel(self):
@@ -67,3 +84,5 @@ class SettingsDialog(uicls_log, basecls_log):
         self.splineTightnessSpinBox.setValue(DEFAULT_TIGHTNESS)
         self.splineToleranceSpinBox.setValue(DEFAULT_TOLERANCE)
         self.max_segments_nr_sbox.setValue(DEFAULT_MAX_SEGMENTS)
+        self.adaptiveCheckBox.setChecked(DEFAULT_ADAPTIVE)
+        self.outputModeComboBox.setCurrentIndex(DEFAULT_OUTPUT_MODE)
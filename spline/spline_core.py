@@ -0,0 +1,773 @@
+"""
+/***************************************************************************
+    Spline interpolation on coordinate arrays, independent of QGIS
+    Hermite interpolation moved from spline_interp.py
+                              -------------------
+        begin                : October 2026
+        copyright            : (C) 2026 by the Spline plugin contributors
+                               (C) 2014 by Radim Blazek (Hermite interpolation)
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+
+Only NumPy is imported here, so the module can be used in worker processes and scripts without QGIS.
+spline_interp wraps these functions for QgsPoint lists and settings.
+"""
+from functools import lru_cache
+
+import numpy as np
+
+from .profiling import profiler
+
+# number of segments interpolated at once by hermite_stream()
+STREAM_BLOCK = 4096
+# maximum number of segment pairs tested at once by self_intersects()
+SWEEP_BLOCK = 1 << 20
+# share of the tolerance taken by adaptive sampling, the rest is left to simplification of the samples
+ADAPTIVE_SHARE = 0.2
+
+
+def hermite_array(xy, tolerance, tightness, max_segments, adaptive=False, return_knots=False, closed=False):
+    """
+    Takes (N, 2) knot coordinates and returns (M, 2) coordinates of the spline.
+    Knots are kept, points sampled between them are simplified segment by segment using the tolerance.
+    With adaptive sampling each segment gets just the number of steps the tolerance needs (at most
+    max_segments), simplified the same way - a cheap pass, as there are few samples.
+    If return_knots is True, (N,) array of knot indices in the result is returned too.
+    Closed lines (rings) have the tangent at the first and last knot computed across the closing point.
+    """
+    xy = np.asarray(xy, dtype=float)
+    if len(xy) < 3:
+        result, knots = xy.copy(), np.arange(len(xy))
+    elif adaptive:
+        result, knots = hermite_adaptive(xy, tolerance, tightness, max_segments, closed)
+    else:
+        # all segments in one line, simplified keeping the knots
+        dense, fixed = hermite_dense(xy, tightness, max_segments, closed)
+        keep = douglas_peucker(dense, tolerance, fixed)
+        result, knots = dense[keep], np.cumsum(keep)[fixed] - 1
+    if return_knots:
+        return result, knots
+    return result
+
+
+def hermite_dense(xy, tightness, max_segments, closed=False):
+    """
+    All points sampled on the Hermite curve of (N, 2) knots xy in one (M, 2) line, knots included.
+    Returns the line and (N,) indices of the knots in it - every (S + 1)-th vertex.
+    """
+    samples = hermite_samples(xy, tightness, max_segments, closed)
+    dense = np.concatenate((np.concatenate((xy[:-1, np.newaxis], samples), axis=1).reshape(-1, 2), xy[-1:]))
+    return dense, np.arange(0, len(dense), samples.shape[1] + 1)
+
+
+def hermite_arcs(xy, tolerance, tightness, max_segments, closed=False):
+    """
+    Circular arcs fitted within tolerance to the Hermite curve of (N, 2) knots xy sampled with max_segments.
+    Returns (M, 2) vertices of arcs (start, then middle and end of each arc), (N,) indices of the knots in them
+    (knots are always arc ends) and mask of straight arcs, see fit_arcs(). Lines with less than 3 knots
+    get straight arcs.
+    """
+    xy = np.asarray(xy, dtype=float)
+    if len(xy) < 3:
+        return fit_arcs(xy, np.arange(len(xy)), tolerance)
+    dense, fixed = hermite_dense(xy, tightness, max_segments, closed)
+    return fit_arcs(dense, fixed, tolerance)
+
+
+def fit_arcs(xy, fixed, tolerance):
+    """
+    Circular arcs fitted to (N, 2) line xy: vertices between arc ends deviate from the arc by at most tolerance.
+    Vertices with indices in sorted array fixed are always arc ends. Returns (2K + 1, 2) vertices of K arcs (start,
+    then middle and end of each arc), indices of the fixed vertices in them and (K,) mask of straight arcs - where
+    all vertices are within tolerance from the chord, their middle point is in the middle of the chord.
+    An arc through the ends and the middle vertex is tried for each range of vertices, ranges not fitting are
+    split in halves - all ranges of the stack in one vectorized pass.
+    """
+    with profiler.stage("fit arcs", len(xy)):
+        return _fit_arcs(xy, fixed, tolerance)
+
+
+def _fit_arcs(xy, fixed, tolerance):
+    fixed = np.asarray(fixed)
+    if len(fixed) < 2:
+        return xy[fixed], np.arange(len(fixed)), np.zeros(0, dtype=bool)
+    arc_starts, arc_middles, arc_straight = [], [], []
+    starts, ends = fixed[:-1], fixed[1:]
+    while len(starts):
+        middles = (starts + ends) // 2
+        inner = ends - starts - 1
+        chord_dev = np.zeros(len(starts))
+        circle_dev = np.full(len(starts), np.inf)
+        has_inner = inner > 0
+        if has_inner.any():
+            # flat indices of vertices inside the ranges with any, grouped by range
+            ranges = np.flatnonzero(has_inner)
+            group = np.repeat(ranges, inner[ranges])
+            offsets = np.cumsum(inner[ranges]) - inner[ranges]
+            idx = starts[group] + 1 + np.arange(len(group)) - np.repeat(offsets, inner[ranges])
+            dist = points_segment_distance(xy[idx], xy[starts[group]], xy[ends[group]])
+            chord_dev[ranges] = np.maximum.reduceat(dist, offsets)
+            center, radius = _circle(xy[starts], xy[middles], xy[ends])
+            with np.errstate(invalid="ignore"):
+                dist = np.abs(np.hypot(*(xy[idx] - center[group]).T) - radius[group])
+                # vertices outside of the angle of the arc (at most a half circle) are nearest to an arc end
+                start_dir = xy[starts] - center
+                end_dir = xy[ends] - center
+                span = _cross(start_dir, end_dir)[group]
+                vertex_dir = xy[idx] - center[group]
+                off_arc = (_cross(start_dir[group], vertex_dir) * span < 0) | (
+                    _cross(vertex_dir, end_dir[group]) * span < 0
+                )
+                off, off_group = idx[off_arc], group[off_arc]
+                dist[off_arc] = np.minimum(
+                    np.hypot(*(xy[off] - xy[starts[off_group]]).T), np.hypot(*(xy[off] - xy[ends[off_group]]).T)
+                )
+                circle_dev[ranges] = np.maximum.reduceat(dist, offsets)
+                # arcs over a half circle pass around where a curve turning back has no vertices
+                chord = xy[ends] - xy[starts]
+                circle_dev[_cross(chord, center - xy[starts]) * _cross(chord, xy[middles] - xy[starts]) > 0] = np.inf
+        straight = chord_dev <= tolerance
+        with np.errstate(invalid="ignore"):
+            done = straight | (circle_dev <= tolerance)
+        arc_starts.append(starts[done])
+        arc_straight.append(straight[done])
+        arc_middles.append(
+            np.where(straight[done, np.newaxis], (xy[starts[done]] + xy[ends[done]]) / 2.0, xy[middles[done]])
+        )
+        split = ~done
+        starts, ends = np.concatenate((starts[split], middles[split])), np.concatenate((middles[split], ends[split]))
+    arc_starts = np.concatenate(arc_starts)
+    order = np.argsort(arc_starts, kind="stable")
+    arc_starts = arc_starts[order]
+    arc_ends = np.append(arc_starts[1:], fixed[-1])
+    result = np.empty((2 * len(arc_starts) + 1, 2), dtype=float)
+    result[0] = xy[fixed[0]]
+    result[1::2] = np.concatenate(arc_middles)[order]
+    result[2::2] = xy[arc_ends]
+    knots = np.concatenate(([0], 2 * (np.searchsorted(arc_ends, fixed[1:]) + 1)))
+    return result, knots, np.concatenate(arc_straight)[order]
+
+
+def _cross(a, b):
+    return a[:, 0] * b[:, 1] - a[:, 1] * b[:, 0]
+
+
+def _circle(p0, p1, p2):
+    """Centers and radii of circles through points of (N, 2) arrays, NaN for collinear points."""
+    a = p1 - p0
+    b = p2 - p0
+    d = 2.0 * _cross(a, b)
+    a2 = (a * a).sum(axis=1)
+    b2 = (b * b).sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ux = (b[:, 1] * a2 - a[:, 1] * b2) / d
+        uy = (a[:, 0] * b2 - b[:, 0] * a2) / d
+    center = p0 + np.column_stack((ux, uy))
+    center[d == 0] = np.nan
+    return center, np.hypot(*(center - p0).T)
+
+
+def splice_spline(
+    xy, spline, knots, start, end, new, tolerance, tightness, max_segments, adaptive=False, closed=False
+):
+    """
+    Replaces knots xy[start:end] of spline with (K, 2) new knots - moves, inserts or deletes knots. spline and
+    knots are the result of hermite_array() with return_knots. Only the segments whose tangents change (at most
+    K + 3) are splined again, the rest of spline is copied. Returns the new knots, spline and knot indices in it.
+    """
+
+    def spline_window(window_xy, window_closed):
+        return hermite_array(window_xy, tolerance, tightness, max_segments, adaptive, True, window_closed) + (None,)
+
+    new_xy, result, result_knots, _ = _splice(xy, spline, knots, None, start, end, new, closed, spline_window)
+    return new_xy, result, result_knots
+
+
+def splice_arcs(xy, vertices, knots, straight, start, end, new, tolerance, tightness, max_segments, closed=False):
+    """
+    Like splice_spline() for arcs returned by hermite_arcs(), only the arcs of segments whose tangents change are
+    fitted again. Returns the new knots, arc vertices, knot indices in them and mask of straight arcs.
+    """
+
+    def spline_window(window_xy, window_closed):
+        return hermite_arcs(window_xy, tolerance, tightness, max_segments, window_closed)
+
+    return _splice(xy, vertices, knots, straight, start, end, new, closed, spline_window)
+
+
+def _splice(xy, spline, knots, straight, start, end, new, closed, spline_window):
+    xy = np.asarray(xy, dtype=float)
+    new_xy = np.concatenate((xy[:start], np.asarray(new, dtype=float).reshape(-1, 2), xy[end:]))
+    n = len(new_xy)
+    # segments splined again, in new knots: those using tangents of the new knots and of their neighbours
+    first = max(start - 2, 0)
+    last = min(start + n - len(xy) + end - start, n - 2)
+    old_last = last - n + len(xy)
+    if len(xy) < 3 or n < 3 or (closed and (first < 1 or last + 2 > n - 1)):
+        # short lines, or the change reaches the closing knot of a ring
+        return (new_xy,) + tuple(spline_window(new_xy, closed))
+    # knots of the segments and their neighbours, the tangents at the window ends are not used
+    window = max(first - 1, 0)
+    piece, piece_knots, piece_straight = spline_window(new_xy[window : last + 3], False)
+    piece_knots = piece_knots[first - window : last + 2 - window]
+    piece = piece[piece_knots[0] : piece_knots[-1] + 1]
+    cut_start, cut_end = knots[first], knots[old_last + 1]
+    result = np.concatenate((spline[:cut_start], piece, spline[cut_end + 1 :]))
+    result_knots = np.concatenate(
+        (
+            knots[:first],
+            piece_knots - piece_knots[0] + cut_start,
+            knots[old_last + 2 :] + cut_start + len(piece) - 1 - cut_end,
+        )
+    )
+    if straight is not None:
+        piece_straight = piece_straight[piece_knots[0] // 2 : piece_knots[-1] // 2]
+        straight = np.concatenate((straight[: cut_start // 2], piece_straight, straight[cut_end // 2 :]))
+    return new_xy, result, result_knots, straight
+
+
+def hermite_many(coords, offsets, tolerance, tightness, max_segments, adaptive=False, closed=False):
+    """
+    Splines of many lines in one vectorized pass. Knots of line i are (N, 2) coords[offsets[i]:offsets[i + 1]].
+    Returns (M, 2) coordinates of all splines, offsets of the splines in them (same layout as coords and offsets)
+    and (N,) indices of all knots in them. Each line gives the same result as hermite_array(), lines with less
+    than 3 knots are copied.
+    """
+    coords = np.asarray(coords, dtype=float)
+    offsets = np.asarray(offsets)
+    starts, ends = offsets[:-1], offsets[1:] - 1
+    lines = ends - starts >= 2
+    # segments from each knot to the next one of the same line with at least 3 knots
+    splined = np.zeros(max(len(coords) - 1, 0), dtype=bool)
+    splined[np.repeat(lines, ends - starts + 1)[:-1]] = True
+    splined[ends[(ends >= starts) & (ends < len(splined))]] = False
+    if not splined.any():
+        return coords.copy(), offsets.copy(), np.arange(len(coords))
+    with profiler.stage("tangents", len(coords)):
+        tangents = np.zeros_like(coords)
+        tangents[1:-1] = coords[2:] - coords[:-2]
+        first, last = starts[lines], ends[lines]
+        if closed:
+            tangents[first] = tangents[last] = coords[first + 1] - coords[last - 1]
+        else:
+            tangents[first] = coords[first + 1] - coords[first]
+            tangents[last] = coords[last] - coords[last - 1]
+        tangents *= tightness
+    if adaptive:
+        with profiler.stage("adaptive sampling", len(coords) - 1):
+            steps = segment_steps(coords, tangents, tolerance * ADAPTIVE_SHARE, max_segments)
+            steps[~splined] = 1
+            result, knots = _sample_adaptive(coords, tangents, steps)
+        result, knots = _simplify_samples(result, knots, tolerance)
+    else:
+        segments = np.flatnonzero(splined)
+        with profiler.stage("hermite sampling", len(segments)):
+            samples = hermite_segments(coords, tangents, segments, max_segments)
+        # knots with the samples of their segments in one line, simplified keeping the knots
+        counts = np.where(np.append(splined, False), samples.shape[1] + 1, 1)
+        knots = np.cumsum(counts) - counts
+        dense = np.empty((counts.sum(), 2), dtype=float)
+        dense[knots] = coords
+        inner = (knots[segments, np.newaxis] + np.arange(1, samples.shape[1] + 1)).ravel()
+        dense[inner] = samples.reshape(-1, 2)
+        keep = douglas_peucker(dense, tolerance, knots)
+        result, knots = dense[keep], np.cumsum(keep)[knots] - 1
+    return result, np.append(knots, len(result))[offsets], knots
+
+
+def hermite_stream(
+    xy, tolerance, tightness, max_segments, adaptive=False, closed=False, values=None, block_size=STREAM_BLOCK
+):
+    """
+    Generator of the spline of (N, 2) knots xy in blocks of (K, 2) vertices, block_size segments at a time, so only
+    one block of samples is in memory. Joined, the blocks are the same as hermite_array().
+    If (N, V) array values of knots is given, the blocks have V more columns of values interpolated like
+    with interpolate_values().
+    """
+    xy = np.asarray(xy, dtype=float)
+    values = np.empty((len(xy), 0)) if values is None else np.asarray(values, dtype=float)
+    if len(xy) < 3:
+        yield np.column_stack((xy, values))
+        return
+    # distance along the spline before the block and, for each values column, the knots (their distance along
+    # the line of (distance, value) points and value) not yet passed by the spline distance
+    spline_offset = 0.0
+    pending = [(np.empty(0), np.empty(0)) for _ in range(values.shape[1])]
+    for start in range(0, len(xy) - 1, block_size):
+        end = min(start + block_size, len(xy) - 1)
+        spline_xy, knots = _hermite_block(xy, start, end, tolerance, tightness, max_segments, adaptive, closed)
+        columns = [spline_xy]
+        if values.shape[1]:
+            spline_dist = cumulative_length(spline_xy) + spline_offset
+            knot_dist = spline_dist[knots]
+            for i, (pending_dist, pending_values) in enumerate(pending):
+                knot_values = values[start : end + 1, i]
+                values_line_dist = cumulative_length(np.column_stack((knot_dist, knot_values)))
+                if len(pending_dist):
+                    # the first knot of the block is the last pending one
+                    values_line_dist = values_line_dist[1:] + pending_dist[-1]
+                    knot_values = knot_values[1:]
+                pending_dist = np.concatenate((pending_dist, values_line_dist))
+                pending_values = np.concatenate((pending_values, knot_values))
+                columns.append(np.interp(spline_dist, pending_dist, pending_values))
+                # knots before the one preceding the farthest spline distance are not needed anymore
+                first = max(int(np.searchsorted(pending_dist, spline_dist[-1], side="right")) - 1, 0)
+                first = min(first, len(pending_dist) - 1)
+                pending[i] = (pending_dist[first:], pending_values[first:])
+            spline_offset = spline_dist[-1]
+        block = np.column_stack(columns)
+        # the first knot of a block is the last one of the previous block
+        yield block if start == 0 else block[1:]
+
+
+def _hermite_block(xy, start, end, tolerance, tightness, max_segments, adaptive, closed):
+    """Spline between knots start and end of (N, 2) xy and indices of the knots in it, see hermite_array()."""
+    idx = np.arange(start, end + 1)
+    block_xy = xy[idx]
+    # tangents as in tangents_array() of all knots
+    tangents = xy[np.minimum(idx + 1, len(xy) - 1)] - xy[np.maximum(idx - 1, 0)]
+    if closed:
+        tangents[(idx == 0) | (idx == len(xy) - 1)] = xy[1] - xy[-2]
+    tangents = tangents * tightness
+    if adaptive:
+        with profiler.stage("adaptive sampling", len(idx) - 1):
+            steps = segment_steps(block_xy, tangents, tolerance * ADAPTIVE_SHARE, max_segments)
+            result, knots = _sample_adaptive(block_xy, tangents, steps)
+        return _simplify_samples(result, knots, tolerance)
+    with profiler.stage("hermite sampling", len(idx) - 1):
+        samples = hermite_segments(block_xy, tangents, np.arange(len(idx) - 1), max_segments)
+    dense = np.concatenate(
+        (np.concatenate((block_xy[:-1, np.newaxis], samples), axis=1).reshape(-1, 2), block_xy[-1:])
+    )
+    fixed = np.arange(0, len(dense), samples.shape[1] + 1)
+    keep = douglas_peucker(dense, tolerance, fixed)
+    return dense[keep], np.cumsum(keep)[fixed] - 1
+
+
+def hermite_samples(xy, tightness, max_segments, closed=False):
+    """
+    Evaluates the Hermite curve between each pair of successive knots of (N, 2) array xy.
+    Returns (N - 1, S, 2) array of points sampled inside the segments, knots excluded.
+    """
+    xy = np.asarray(xy, dtype=float)
+    with profiler.stage("tangents", len(xy)):
+        tangents = tangents_array(xy, tightness, closed)
+    with profiler.stage("hermite sampling", len(xy) - 1):
+        return hermite_segments(xy, tangents, np.arange(len(xy) - 1), max_segments)
+
+
+def hermite_segments(xy, tangents, segments, max_segments):
+    """
+    Evaluates the Hermite curve of segments (indices of their first knots) of (N, 2) knots xy with tangents.
+    Returns (len(segments), S, 2) array of points sampled inside the segments, knots excluded.
+    """
+    # geometry matrix of each segment: p0, p1, t0, t1 -> (K, 4, 1, 2)
+    geom = np.stack((xy[segments], xy[segments + 1], tangents[segments], tangents[segments + 1]), axis=1)
+    # the curve between repeated knots would loop out and back, it stays at the knot
+    geom[np.all(geom[:, 0] == geom[:, 1], axis=1), 2:] = 0.0
+    geom = geom[:, :, np.newaxis, :]
+    # (S, 4) basis against (K, 4, 1, 2) geometry, summed in the same order as the scalar formula
+    h = hermite_basis(max_segments)[:, :, np.newaxis]
+    return (h[:, 0] * geom[:, 0] + h[:, 1] * geom[:, 1]) + (h[:, 2] * geom[:, 2] + h[:, 3] * geom[:, 3])
+
+
+def hermite_adaptive(xy, tolerance, tightness, max_segments, closed=False):
+    """
+    Samples the Hermite curve of (N, 2) knots array xy with a step chosen for each segment from the tolerance.
+    Returns (M, 2) array of knots and sampled points and (N,) array of knot indices in it.
+    """
+    xy = np.asarray(xy, dtype=float)
+    with profiler.stage("tangents", len(xy)):
+        tangents = tangents_array(xy, tightness, closed)
+    with profiler.stage("adaptive sampling", len(xy) - 1):
+        steps = segment_steps(xy, tangents, tolerance * ADAPTIVE_SHARE, max_segments)
+        result, knots = _sample_adaptive(xy, tangents, steps)
+    return _simplify_samples(result, knots, tolerance)
+
+
+def _simplify_samples(xy, knots, tolerance):
+    # steps of a segment are equal, the bends of the curve often need fewer vertices; the samples are within
+    # ADAPTIVE_SHARE of the tolerance from the curve, so the simplified line stays within the tolerance
+    keep = douglas_peucker(xy, tolerance * (1 - ADAPTIVE_SHARE), knots)
+    return xy[keep], np.cumsum(keep)[knots] - 1
+
+
+def _sample_adaptive(xy, tangents, steps):
+    # parameters s = k / steps for k in 1 .. steps - 1 of all segments in one flat array
+    inner = steps - 1
+    seg = np.repeat(np.arange(len(steps)), inner)
+    k = np.arange(len(seg)) - np.repeat(np.cumsum(inner) - inner, inner) + 1
+    s = (k / steps[seg])[:, np.newaxis]
+    s2 = s * s
+    s3 = s2 * s
+    samples = (
+        ((2 * s3) - (3 * s2) + 1) * xy[seg]
+        + (3 * s2 - 2 * s3) * xy[seg + 1]
+        + (s3 - (2 * s2) + s) * tangents[seg]
+        + (s3 - s2) * tangents[seg + 1]
+    )
+
+    result = np.empty((len(xy) + len(samples), 2), dtype=float)
+    knots = np.arange(len(xy)) + np.concatenate(([0], np.cumsum(inner)))
+    is_knot = np.zeros(len(result), dtype=bool)
+    is_knot[knots] = True
+    result[is_knot] = xy
+    result[~is_knot] = samples
+    return result, knots
+
+
+def segment_steps(xy, tangents, tolerance, max_segments):
+    """
+    Number of equal parameter steps for each segment, so that the chords deviate from the curve by at most tolerance.
+    The chord of a step h deviates from a curve by at most h^2 / 8 * max|B''|. B'' of a cubic is linear in s,
+    so its maximum over a segment is at one of the segment ends. Segments whose curve stays within tolerance
+    of their chord (straight lines with unevenly spaced knots) and repeated knots get one step.
+    """
+    p0, p1 = xy[:-1], xy[1:]
+    t0, t1 = tangents[:-1], tangents[1:]
+    d2_start = np.hypot(*(6 * (p1 - p0) - 4 * t0 - 2 * t1).T)
+    d2_end = np.hypot(*(6 * (p0 - p1) + 2 * t0 + 4 * t1).T)
+    d2_max = np.maximum(d2_start, d2_end)
+    if tolerance <= 0:
+        return np.full(len(d2_max), max(int(max_segments), 1))
+    steps = np.ceil(np.sqrt(d2_max / (8.0 * tolerance)))
+    steps[_straight_segments(p0, p1, t0, t1, tolerance)] = 1
+    return np.clip(steps, 1, max(int(max_segments), 1)).astype(int)
+
+
+def _straight_segments(p0, p1, t0, t1, tolerance):
+    # mask of segments whose curve is within tolerance of the chord: in chord coordinates the curve is
+    # u(s) = L h2 + a h3 + b h4 along and v(s) = c h3 + d h4 across it, |h3|, |h4| <= 4 / 27
+    chord = p1 - p0
+    length = np.hypot(*chord.T)
+    repeated = length == 0
+    along = chord / np.where(repeated, 1.0, length)[:, np.newaxis]
+    across = np.column_stack((-along[:, 1], along[:, 0]))
+    a, b = (t0 * along).sum(axis=1), (t1 * along).sum(axis=1)
+    offset = 4.0 / 27.0 * (np.abs((t0 * across).sum(axis=1)) + np.abs((t1 * across).sum(axis=1)))
+    # u'(s) = 3 A s^2 + 2 B s + a, the curve overshoots the chord ends at its roots
+    cubic, square = a + b - 2 * length, 3 * length - 2 * a - b
+    with np.errstate(divide="ignore", invalid="ignore"):
+        root = np.sqrt(square * square - 3 * cubic * a)
+        extrema = np.stack(((-square + root) / (3 * cubic), (-square - root) / (3 * cubic), -a / (2 * square)))
+    extrema = np.clip(np.nan_to_num(extrema, nan=0.0, posinf=0.0, neginf=0.0), 0.0, 1.0)
+    u = cubic * extrema**3 + square * extrema**2 + a * extrema
+    overshoot = np.maximum(np.maximum(-u, u - length).max(axis=0), 0.0)
+    return repeated | (offset + overshoot <= tolerance)
+
+
+def tangents_array(xy, tightness, closed=False):
+    """
+    Tangents at knots of (N, 2) array xy, first and last go in edge direction.
+    If closed, the first and last knot is the same point and its tangent goes from the last but one to the second knot.
+    """
+    tangents = np.empty_like(xy)
+    tangents[1:-1] = xy[2:] - xy[:-2]
+    if closed:
+        tangents[0] = tangents[-1] = xy[1] - xy[-2]
+    else:
+        tangents[0] = xy[1] - xy[0]
+        tangents[-1] = xy[-1] - xy[-2]
+    return tangents * tightness
+
+
+@lru_cache(maxsize=16)
+def hermite_basis(max_segments):
+    """(S, 4) matrix of h1-h4 basis functions evaluated at sampling parameters s of a segment."""
+    # Fixed sampling makes max_segments points which are then pruned using tolerance,
+    # see hermite_adaptive() for steps derived from the tolerance.
+    # s is accumulated step by step, for some max_segments the last sample falls just below 1.
+    t = 1.0 / float(max_segments)
+    s = t
+    params = []
+    while s < 1:
+        params.append(s)
+        s = s + t
+    basis = np.array(
+        [
+            (
+                (2 * (s ** 3)) - (3 * (s ** 2)) + 1,
+                3 * (s ** 2) - 2 * (s ** 3),
+                (s ** 3) - (2 * (s ** 2)) + s,
+                (s ** 3) - (s ** 2),
+            )
+            for s in params
+        ],
+        dtype=float,
+    ).reshape(-1, 4)
+    basis.setflags(write=False)
+    return basis
+
+
+def smooth_knots(xy, smoothing, tolerance, closed=False):
+    """
+    Knots of the cubic smoothing spline of (N, 2) noisy vertices xy: the spline is smoothed by smoothing_spline()
+    and its vertices are simplified with the tolerance, so only the knots the smoothed shape needs are kept.
+    Returns (K,) indices of the kept vertices (for their z and m values) and (K, 2) their smoothed coordinates.
+    Lines of 3 or more vertices keep at least 3, the first and last vertex are always kept.
+    """
+    xy = np.asarray(xy, dtype=float)
+    if len(xy) < 3 or smoothing <= 0:
+        return np.arange(len(xy)), xy.copy()
+    smoothed = smoothing_spline(xy, smoothing, closed)
+    keep = douglas_peucker(smoothed, tolerance, np.array([0, len(xy) - 1]))
+    if np.count_nonzero(keep) < 3:
+        keep[len(xy) // 2] = True
+    idx = np.flatnonzero(keep)
+    return idx, smoothed[idx]
+
+
+def smoothing_spline(xy, smoothing, closed=False):
+    """
+    Values at the vertices of the cubic smoothing spline (Reinsch) of (N, 2) vertices xy parametrized by chord
+    length. It minimizes the sum of squared distances to the vertices plus smoothing times the integral of the
+    squared second derivative, with lengths in units of the mean vertex spacing - noise is averaged over about
+    smoothing ** 0.25 vertices on each side, 0 interpolates. A pentadiagonal system is solved in O(N).
+    Closed lines (first and last vertex the same) are extended by vertices from the other end before smoothing.
+    """
+    with profiler.stage("smoothing", len(xy)):
+        xy = np.asarray(xy, dtype=float)
+        if not closed or len(xy) < 4:
+            return _smoothing_spline(xy, smoothing)
+        # the smoothing reaches this many vertices further (it decays exponentially)
+        pad = min(int(np.ceil(8 * smoothing ** 0.25)) + 2, len(xy) - 1)
+        ring = xy[:-1]
+        smoothed = _smoothing_spline(np.concatenate((ring[len(ring) - pad :], xy, ring[1 : pad + 1])), smoothing)
+        smoothed = smoothed[pad : pad + len(xy)]
+        smoothed[-1] = smoothed[0]
+        return smoothed
+
+
+def _smoothing_spline(xy, smoothing):
+    # repeated vertices get the values of the previous ones
+    moved = np.r_[True, np.any(xy[1:] != xy[:-1], axis=1)]
+    points = xy[moved]
+    smoothed = points.copy()
+    if len(points) >= 3 and smoothing > 0:
+        h = np.hypot(*np.diff(points, axis=0).T)
+        h = h / h.mean()
+        # Q is the (N, N - 2) second difference matrix, R the (N - 2, N - 2) tridiagonal matrix of the knot spacing
+        a, c = 1.0 / h[:-1], 1.0 / h[1:]
+        b = -a - c
+        diagonal = (h[:-1] + h[1:]) / 3.0 + smoothing * (a * a + b * b + c * c)
+        off1 = h[1:-1] / 6.0 + smoothing * (b[:-1] * a[1:] + c[:-1] * b[1:])
+        off2 = smoothing * c[:-2] * a[2:]
+        gamma = _solve_pentadiagonal(
+            diagonal, off1, off2, a[:, None] * points[:-2] + b[:, None] * points[1:-1] + c[:, None] * points[2:]
+        )
+        # smoothed = points - smoothing * Q gamma
+        smoothed[:-2] -= smoothing * a[:, None] * gamma
+        smoothed[1:-1] -= smoothing * b[:, None] * gamma
+        smoothed[2:] -= smoothing * c[:, None] * gamma
+    return smoothed[np.cumsum(moved) - 1]
+
+
+def _solve_pentadiagonal(diagonal, off1, off2, rhs):
+    """
+    Solves the symmetric positive definite pentadiagonal system with (M,) diagonal, (M - 1,) first and (M - 2,)
+    second off-diagonal for (M, 2) rhs by LDL' factorization. The recurrences are sequential, plain floats are
+    faster in them than NumPy scalars.
+    """
+    m = len(diagonal)
+    d = diagonal.tolist()
+    e = off1.tolist() + [0.0]
+    f = off2.tolist() + [0.0, 0.0]
+    bx, by = rhs[:, 0].tolist(), rhs[:, 1].tolist()
+    # L has 1 on the diagonal, l1 and l2 below it
+    dd = [0.0] * m
+    l1 = [0.0] * (m + 1)
+    l2 = [0.0] * (m + 2)
+    for i in range(m):
+        di = d[i] - l1[i] * l1[i] * (dd[i - 1] if i > 0 else 0.0) - l2[i] * l2[i] * (dd[i - 2] if i > 1 else 0.0)
+        dd[i] = di
+        l2[i + 2] = f[i] / di
+        l1[i + 1] = (e[i] - l2[i + 1] * l1[i] * (dd[i - 1] if i > 0 else 0.0)) / di
+    zx, zy = [0.0] * (m + 2), [0.0] * (m + 2)
+    for i in range(m):
+        zx[i + 2] = bx[i] - l1[i] * zx[i + 1] - l2[i] * zx[i]
+        zy[i + 2] = by[i] - l1[i] * zy[i + 1] - l2[i] * zy[i]
+    x, y = [0.0] * (m + 2), [0.0] * (m + 2)
+    for i in range(m - 1, -1, -1):
+        x[i] = zx[i + 2] / dd[i] - l1[i + 1] * x[i + 1] - l2[i + 2] * x[i + 2]
+        y[i] = zy[i + 2] / dd[i] - l1[i + 1] * y[i + 1] - l2[i + 2] * y[i + 2]
+    return np.column_stack((x[:m], y[:m]))
+
+
+def simplify_array(xy, tolerance):
+    """Douglas-Peucker simplification of (N, 2) array xy, same as simplify_points() without GEOS."""
+    xy = np.asarray(xy, dtype=float)
+    if len(xy) < 3:
+        return xy.copy()
+    return xy[douglas_peucker(xy, tolerance, np.array([0, len(xy) - 1]))]
+
+
+def douglas_peucker(xy, tolerance, fixed):
+    """
+    Returns mask of (N, 2) array xy vertices kept by Douglas-Peucker simplification. Vertices with indices in
+    sorted array fixed are always kept and the line between each pair of them is simplified on its own.
+    Instead of recursion, a stack of ranges is processed - all ranges of the stack in one vectorized pass.
+    """
+    with profiler.stage("simplify", len(xy)):
+        return _douglas_peucker(xy, tolerance, fixed)
+
+
+def _douglas_peucker(xy, tolerance, fixed):
+    keep = np.zeros(len(xy), dtype=bool)
+    keep[fixed] = True
+    starts = np.asarray(fixed[:-1])
+    ends = np.asarray(fixed[1:])
+    while True:
+        inner = ends - starts - 1
+        has_inner = inner > 0
+        starts, ends, inner = starts[has_inner], ends[has_inner], inner[has_inner]
+        if not len(starts):
+            break
+        # flat indices of vertices inside the ranges, grouped by range
+        group = np.repeat(np.arange(len(starts)), inner)
+        offsets = np.cumsum(inner) - inner
+        idx = starts[group] + 1 + np.arange(len(group)) - offsets[group]
+        dist = points_segment_distance(xy[idx], xy[starts[group]], xy[ends[group]])
+        dist_max = np.maximum.reduceat(dist, offsets)
+        # the first farthest vertex of each range
+        first = np.flatnonzero(dist == dist_max[group])
+        first = first[np.r_[True, np.diff(group[first]) != 0]]
+        split = dist_max > tolerance
+        farthest = idx[first][split]
+        keep[farthest] = True
+        starts, ends = np.concatenate((starts[split], farthest)), np.concatenate((farthest, ends[split]))
+    return keep
+
+
+def points_segment_distance(p, a, b):
+    """Distances of (N, 2) points p to segments a-b, computed the same way GEOS does."""
+    d = b - a
+    len2 = d[:, 0] * d[:, 0] + d[:, 1] * d[:, 1]
+    ap = p - a
+    with np.errstate(divide="ignore", invalid="ignore"):
+        r = (ap[:, 0] * d[:, 0] + ap[:, 1] * d[:, 1]) / len2
+        s = ((a[:, 1] - p[:, 1]) * d[:, 0] - (a[:, 0] - p[:, 0]) * d[:, 1]) / len2
+    dist = np.abs(s) * np.sqrt(len2)
+    dist_a = np.sqrt(ap[:, 0] * ap[:, 0] + ap[:, 1] * ap[:, 1])
+    bp = p - b
+    dist_b = np.sqrt(bp[:, 0] * bp[:, 0] + bp[:, 1] * bp[:, 1])
+    dist = np.where((len2 == 0) | (r <= 0), dist_a, np.where(r >= 1, dist_b, dist))
+    return dist
+
+
+def cumulative_length(xy):
+    """Distances of (N, 2) line vertices from the line start."""
+    return np.concatenate(([0.0], np.cumsum(np.hypot(*np.diff(xy, axis=0).T))))
+
+
+def values_line_is_valid(knot_dist, values):
+    """Checks the line of (distance along spline, z or m value) points of knots the way GEOS validates lines."""
+    pts = np.column_stack((knot_dist, values))
+    if not np.isfinite(pts).all():
+        return False
+    return bool((pts[1:] != pts[:-1]).any())
+
+
+def knot_values_are_valid(xy, values):
+    """
+    values_line_is_valid() from knots only, without the spline: knot distances along the spline differ
+    where successive knots differ.
+    """
+    if not np.isfinite(values).all() or not np.isfinite(xy).all():
+        return False
+    return bool((values[1:] != values[:-1]).any() or (xy[1:] != xy[:-1]).any())
+
+
+def interpolate_values(spline_dist, knot_dist, values):
+    """
+    Z or m values of spline vertices at spline_dist interpolated from values at knots at knot_dist.
+    Same as interpolating along the line of (distance along spline, value) points of knots:
+    the spline distance is measured along that line.
+    """
+    pts = np.column_stack((knot_dist, values))
+    values_line_dist = cumulative_length(pts)
+    return np.interp(spline_dist, values_line_dist, values)
+
+
+def self_intersects(lines, closed=False):
+    """
+    Checks if segments of (N, 2) arrays in list lines intersect or touch each other. Neighbouring segments of a line
+    (and the first and last segment of closed lines) share a vertex and are not checked against each other,
+    repeated vertices are skipped.
+    Sweep line along x: segments sorted by their minimal x are tested only against the following segments
+    which start before they end, in blocks of candidate pairs.
+    """
+    with profiler.stage("self-intersection check", sum(len(xy) for xy in lines)):
+        return _self_intersects(lines, closed)
+
+
+def _self_intersects(lines, closed):
+    starts, ends, line_ids, seg_ids, line_nsegs = [], [], [], [], []
+    for line_id, xy in enumerate(lines):
+        xy = np.asarray(xy, dtype=float)[:, :2]
+        # repeated vertices make zero length segments, the segments around them would not be neighbours
+        xy = xy[np.r_[True, np.any(xy[1:] != xy[:-1], axis=1)]] if len(xy) else xy
+        nsegs = len(xy) - 1
+        if nsegs < 1:
+            continue
+        starts.append(xy[:-1])
+        ends.append(xy[1:])
+        line_ids.append(np.full(nsegs, line_id))
+        seg_ids.append(np.arange(nsegs))
+        line_nsegs.append(np.full(nsegs, nsegs))
+    if not starts:
+        return False
+    a, b = np.concatenate(starts), np.concatenate(ends)
+    line_id, seg_id, nsegs = np.concatenate(line_ids), np.concatenate(seg_ids), np.concatenate(line_nsegs)
+
+    xmin, xmax = np.minimum(a[:, 0], b[:, 0]), np.maximum(a[:, 0], b[:, 0])
+    ymin, ymax = np.minimum(a[:, 1], b[:, 1]), np.maximum(a[:, 1], b[:, 1])
+    order = np.argsort(xmin, kind="stable")
+    xmin_sorted = xmin[order]
+    # candidates of the i-th sorted segment are sorted segments i + 1 .. last[i] - 1
+    last = np.searchsorted(xmin_sorted, xmax[order], side="right")
+    counts = np.maximum(last - np.arange(len(order)) - 1, 0)
+    cum_counts = np.cumsum(counts)
+    first = 0
+    while first < len(order):
+        # rows of a block have together at most SWEEP_BLOCK candidate pairs (at least one row)
+        done = cum_counts[first - 1] if first else 0
+        end = max(int(np.searchsorted(cum_counts, done + SWEEP_BLOCK, side="right")), first + 1)
+        rows = np.arange(first, end)
+        first = end
+        block_counts = counts[rows]
+        if not block_counts.sum():
+            continue
+        i_sorted = np.repeat(rows, block_counts)
+        offsets = np.arange(len(i_sorted)) - np.repeat(np.cumsum(block_counts) - block_counts, block_counts)
+        j_sorted = i_sorted + 1 + offsets
+        i, j = order[i_sorted], order[j_sorted]
+        # bounding boxes overlap in y (in x it is given by the sweep)
+        overlap = (ymin[i] <= ymax[j]) & (ymin[j] <= ymax[i])
+        # neighbouring segments of the same line
+        same_line = line_id[i] == line_id[j]
+        diff = np.abs(seg_id[i] - seg_id[j])
+        neighbours = same_line & ((diff == 1) | (closed & (diff == nsegs[i] - 1) & (nsegs[i] > 2)))
+        candidates = overlap & ~neighbours
+        i, j = i[candidates], j[candidates]
+        if not len(i):
+            continue
+        o1 = _orientation(a[i], b[i], a[j])
+        o2 = _orientation(a[i], b[i], b[j])
+        o3 = _orientation(a[j], b[j], a[i])
+        o4 = _orientation(a[j], b[j], b[i])
+        if ((o1 * o2 <= 0) & (o3 * o4 <= 0)).any():
+            return True
+    return False
+
+
+def _orientation(p, q, r):
+    """Sign of the cross product (q - p) x (r - p): 1 left turn, -1 right turn, 0 collinear."""
+    return np.sign((q[:, 0] - p[:, 0]) * (r[:, 1] - p[:, 1]) - (q[:, 1] - p[:, 1]) * (r[:, 0] - p[:, 0]))
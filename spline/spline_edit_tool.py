@@ -0,0 +1,261 @@
+"""
+/***************************************************************************
+    Editing of knots of digitized splines
+                              -------------------
+        begin                : October 2026
+        copyright            : (C) 2026 by the Spline plugin contributors
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+import numpy as np
+
+from qgis.PyQt.QtCore import Qt, QTimer
+from qgis.PyQt.QtGui import QColor
+from qgis.PyQt.QtWidgets import QApplication
+from qgis.core import (
+    QgsFeatureRequest,
+    QgsGeometry,
+    QgsMapLayerType,
+    QgsPointXY,
+    QgsRectangle,
+    QgsTolerance,
+    QgsWkbTypes,
+)
+from qgis.gui import QgsMapToolEdit, QgsRubberBand
+
+from .knot_store import geometry_spline, knot_store, spline_geometry
+from .spline_core import points_segment_distance, splice_arcs, splice_spline
+from .spline_tool import SplineTool
+from .utils import OUTPUT_ARCS, OUTPUT_KNOTS
+
+
+def edit_spline(record, vertices, straight, start, end, new):
+    """
+    Replaces knots[start:end] of a spline with record by (K, 2) new knots. vertices and straight are the spline
+    of the record, see geometry_spline(). Only the segments whose tangents change are splined again.
+    Returns the new knots, spline vertices, knot indices in them and mask of straight arcs.
+    """
+    knots = np.array(record["knots"], dtype=float)
+    knot_vertices = np.array(record["knot_vertices"], dtype=int)
+    params = record["tolerance"], record["tension"], record["max_segments"]
+    closed = record["closed"]
+    if record["output_mode"] == OUTPUT_KNOTS:
+        new_knots = np.concatenate((knots[:start], np.reshape(new, (-1, 2)), knots[end:]))
+        return new_knots, new_knots, np.arange(len(new_knots)), None
+    if straight is not None:
+        return splice_arcs(knots, vertices, knot_vertices, straight, start, end, new, *params, closed=closed)
+    new_knots, spline, spline_knots = splice_spline(
+        knots, vertices, knot_vertices, start, end, new, *params, adaptive=record["adaptive"], closed=closed
+    )
+    return new_knots, spline, spline_knots, None
+
+
+class SplineEditTool(QgsMapToolEdit):
+    """
+    Edits knots of splines digitized with the plugin: drag a knot to move it, click on the spline to insert a knot,
+    right click a knot to delete it. Only the segments next to the changed knot are splined again.
+    """
+
+    def __init__(self, iface):
+        super(SplineEditTool, self).__init__(iface.mapCanvas())
+        self.iface = iface
+        self.canvas = self.iface.mapCanvas()
+
+        self.rb = QgsRubberBand(self.canvas, QgsWkbTypes.LineGeometry)
+        self.rb.setColor(QColor(255, 0, 0, 100))
+        self.rb.setWidth(1)
+        self.knots_rb = QgsRubberBand(self.canvas, QgsWkbTypes.PointGeometry)
+        self.knots_rb.setColor(QColor(255, 0, 0))
+        self.knots_rb.setIcon(QgsRubberBand.ICON_CIRCLE)
+        self.knots_rb.setIconSize(8)
+
+        self.layer = None
+        self.feature = None  # feature of the edited spline
+        self.record = None  # its record from the knot store
+        self.vertices = None  # its spline vertices and mask of straight arcs (arcs output only)
+        self.straight = None
+        self.drag_index = None  # index of the dragged knot
+        self.press_pos = None
+
+        # mouse moves are coalesced like in SplineTool
+        self.move_pos = None
+        self.move_timer = QTimer()
+        self.move_timer.setSingleShot(True)
+        self.move_timer.setInterval(SplineTool.refresh_interval())
+        self.move_timer.timeout.connect(self.process_move)
+
+    def canvasMoveEvent(self, event):
+        self.move_pos = event.pos()
+        if not self.move_timer.isActive():
+            self.move_timer.start()
+
+    def process_move(self):
+        if self.move_pos is None:
+            return
+        layer = self.iface.activeLayer()
+        point = self.toLayerCoordinates(layer, self.move_pos)
+        self.move_pos = None
+        if self.drag_index is None:
+            # the spline under the cursor shows its knots
+            self.select(*self.spline_at(layer, point))
+            return
+        _, vertices, _, straight = self.moved_knot(point)
+        self.rb.setToGeometry(self.edited_geometry(vertices, straight), layer)
+
+    def canvasPressEvent(self, event):
+        if event.button() != Qt.LeftButton or self.feature is None:
+            return
+        point = self.toLayerCoordinates(self.layer, event.pos())
+        self.drag_index = self.knot_at(point)
+        self.press_pos = event.pos()
+
+    def canvasReleaseEvent(self, event):
+        self.move_timer.stop()
+        self.move_pos = None
+        layer = self.iface.activeLayer()
+        if layer is None or not layer.isEditable():
+            return
+        point = self.toLayerCoordinates(layer, event.pos())
+        if event.button() == Qt.LeftButton and self.drag_index is not None:
+            dragged = (event.pos() - self.press_pos).manhattanLength() >= QApplication.startDragDistance()
+            edited = self.moved_knot(point) if dragged else None
+            self.drag_index = None
+            self.rb.reset(QgsWkbTypes.LineGeometry)
+            if edited is not None:
+                self.commit(edited)
+            return
+        self.select(*self.spline_at(layer, point))
+        if self.feature is None:
+            return
+        knots = self.record["knots"]
+        index = self.knot_at(point)
+        # lines keep at least 2 knots, rings 3 and the closing one
+        min_knots = 4 if self.record["closed"] else 3
+        if event.button() == Qt.RightButton and index is not None and len(knots) >= min_knots:
+            if self.record["closed"] and index in (0, len(knots) - 1):
+                # the closing knot is replaced by the next one
+                new = np.concatenate((knots[1:-1], knots[1:2]))
+                self.commit(edit_spline(self.record, self.vertices, self.straight, 0, len(knots), new))
+            else:
+                self.commit(edit_spline(self.record, self.vertices, self.straight, index, index + 1, []))
+        elif event.button() == Qt.LeftButton and index is None:
+            segment = self.segment_at(point)
+            if segment is not None:
+                new = [(point.x(), point.y())]
+                self.commit(edit_spline(self.record, self.vertices, self.straight, segment + 1, segment + 1, new))
+
+    def keyPressEvent(self, e):
+        if e.key() == Qt.Key_Escape:
+            self.drag_index = None
+            self.rb.reset(QgsWkbTypes.LineGeometry)
+
+    def search_radius(self):
+        return QgsTolerance.vertexSearchRadius(self.iface.activeLayer(), self.canvas.mapSettings())
+
+    def spline_at(self, layer, point):
+        """Nearest feature with a spline record within the search radius and its record, or Nones."""
+        if layer is None or layer.type() != QgsMapLayerType.VectorLayer or not layer.isEditable():
+            return None, None
+        radius = self.search_radius()
+        rect = QgsRectangle(point.x() - radius, point.y() - radius, point.x() + radius, point.y() + radius)
+        request = QgsFeatureRequest().setFilterRect(rect).setNoAttributes()
+        store = knot_store(layer)
+        found = None, None
+        found_dist = radius
+        point_geom = QgsGeometry.fromPointXY(point)
+        for feature in layer.getFeatures(request):
+            record = store.record(feature)
+            if record is None:
+                continue
+            dist = feature.geometry().distance(point_geom)
+            if dist <= found_dist:
+                found = feature, record
+                found_dist = dist
+        return found
+
+    def select(self, feature, record):
+        """Makes feature the edited spline and shows its knots."""
+        if feature is not None and self.feature is not None and feature.id() == self.feature.id():
+            if record is self.record:
+                return
+        self.layer = self.iface.activeLayer()
+        self.feature = feature
+        self.record = record
+        self.knots_rb.reset(QgsWkbTypes.PointGeometry)
+        if feature is None:
+            return
+        is_polygon = self.layer.geometryType() == QgsWkbTypes.PolygonGeometry
+        arcs = record["output_mode"] == OUTPUT_ARCS
+        self.vertices, self.straight = geometry_spline(feature.geometry(), arcs, is_polygon, record["closed"])
+        knots = QgsGeometry.fromMultiPointXY([QgsPointXY(x, y) for x, y in record["knots"]])
+        self.knots_rb.setToGeometry(knots, self.layer)
+
+    def knot_at(self, point):
+        """Index of the nearest knot of the edited spline within the search radius, None if there is none."""
+        knots = np.array(self.record["knots"], dtype=float)
+        dist = np.hypot(knots[:, 0] - point.x(), knots[:, 1] - point.y())
+        index = int(np.argmin(dist))
+        return index if dist[index] <= self.search_radius() else None
+
+    def segment_at(self, point):
+        """Index of the segment of the edited spline (between knots) within the search radius, or None."""
+        if len(self.vertices) < 2:
+            return None
+        p = np.array([[point.x(), point.y()]])
+        dist = points_segment_distance(p, self.vertices[:-1], self.vertices[1:])
+        vertex = int(np.argmin(dist))
+        if dist[vertex] > self.search_radius():
+            return None
+        return int(np.searchsorted(self.record["knot_vertices"], vertex, side="right")) - 1
+
+    def moved_knot(self, point):
+        new = [(point.x(), point.y())]
+        knots = self.record["knots"]
+        if self.record["closed"] and self.drag_index in (0, len(knots) - 1):
+            # the first and last knot of a ring are the same point
+            return edit_spline(self.record, self.vertices, self.straight, 0, len(knots), new + knots[1:-1] + new)
+        return edit_spline(self.record, self.vertices, self.straight, self.drag_index, self.drag_index + 1, new)
+
+    def edited_geometry(self, vertices, straight):
+        is_polygon = self.layer.geometryType() == QgsWkbTypes.PolygonGeometry
+        return spline_geometry(vertices, straight, is_polygon, self.record["closed"])
+
+    def commit(self, edited):
+        """Writes the edited spline to the layer in one edit command and updates its record."""
+        knots, vertices, knot_vertices, straight = edited
+        geom = self.edited_geometry(vertices, straight)
+        self.layer.beginEditCommand(self.tr("Spline edited"))
+        if not self.layer.changeGeometry(self.feature.id(), geom):
+            self.layer.destroyEditCommand()
+            return
+        self.layer.endEditCommand()
+        record = dict(self.record, knots=np.asarray(knots).tolist(), knot_vertices=np.asarray(knot_vertices).tolist())
+        knot_store(self.layer).set_record(self.feature.id(), geom, record)
+        feature = self.layer.getFeature(self.feature.id())
+        self.feature = None
+        self.select(feature, record)
+        self.canvas.refresh()
+
+    def reset(self):
+        """Forgets the edited spline, e.g. when the active layer changes."""
+        self.move_timer.stop()
+        self.drag_index = None
+        self.feature = None
+        self.record = None
+        self.rb.reset(QgsWkbTypes.LineGeometry)
+        self.knots_rb.reset(QgsWkbTypes.PointGeometry)
+
+    def deactivate(self):
+        self.reset()
+        super(SplineEditTool, self).deactivate()
+
+    def isEditTool(self):
+        return True
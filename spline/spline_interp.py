@@ -17,7 +17,6 @@
  *                                                                         *
  ***************************************************************************/
 """
-from qgis.PyQt.QtCore import QSettings
 from qgis.core import (
     QgsGeometry,
     QgsPoint,
@@ -25,88 +24,170 @@ from qgis.core import (
 )
 
 import math
-from .utils import DEFAULT_TIGHTNESS, DEFAULT_TOLERANCE, DEFAULT_MAX_SEGMENTS, SETTINGS_NAME
 
+import numpy as np
+
+from . import spline_core
+from .profiling import profiler
+from .settings import spline_settings
+from .spline_core import (  # noqa: F401 - array functions are available from this module too
+    cumulative_length,
+    douglas_peucker,
+    fit_arcs,
+    hermite_adaptive,
+    hermite_arcs,
+    hermite_basis,
+    hermite_many,
+    hermite_samples,
+    hermite_segments,
+    hermite_stream,
+    points_segment_distance,
+    segment_steps,
+    simplify_array,
+    smooth_knots,
+    smoothing_spline,
+    splice_arcs,
+    splice_spline,
+    tangents_array,
+)
 
-def interpolate(points, tolerance=None, tightness=None, max_segments=None):
+# simplification of sampled points: in-process Douglas-Peucker, or GEOS used as a reference
+SIMPLIFY_NUMPY = "numpy"
+SIMPLIFY_GEOS = "geos"
+
+
+def interpolate(
+    points, tolerance=None, tightness=None, max_segments=None, adaptive=None, simplifier=SIMPLIFY_NUMPY, smoothing=0
+):
+    """
+    Spline of points. With smoothing > 0 the spline goes through the knots of a smoothing spline of points
+    instead of the points themselves, for dense noisy input, see spline_core.smooth_knots().
+    """
+    if len(points) < 3:
+        return [QgsPointXY(pt) for pt in points]
+    tolerance, tightness, max_segments, adaptive = interpolation_params(tolerance, tightness, max_segments, adaptive)
+    if smoothing > 0:
+        _, knots = smooth_knots(points_to_array(points), smoothing, tolerance)
+        points = [QgsPointXY(x, y) for x, y in knots]
+    return hermite(points, tolerance, tightness, max_segments, adaptive, simplifier)
+
+
+def interpolate_segments(
+    points, first=0, tolerance=None, tightness=None, max_segments=None, adaptive=None, simplifier=SIMPLIFY_NUMPY
+):
+    """
+    Interpolates segments of points starting with segment first (segment i goes from points[i] to points[i + 1]).
+    Returns list of QgsPointXY lists, the points sampled inside each segment, knots excluded.
+    A segment depends only on its neighbouring knots, so only points from first - 1 on are used.
+    """
+    tolerance, tightness, max_segments, adaptive = interpolation_params(tolerance, tightness, max_segments, adaptive)
+    nsegments = len(points) - 1 - first
+    if nsegments <= 0:
+        return []
+    if len(points) < 3:
+        return [[] for _ in range(nsegments)]
+    start = max(first - 1, 0)
+    xy = points_to_array(points[start:])
+    xy, knots = hermite_array(xy, tolerance, tightness, max_segments, adaptive, simplifier, return_knots=True)
+    segments = [[QgsPointXY(x, y) for x, y in xy[knots[i] + 1 : knots[i + 1]]] for i in range(len(knots) - 1)]
+    return segments[first - start :]
+
+
+def interpolate_many(
+    coords, offsets, tolerance=None, tightness=None, max_segments=None, adaptive=None, closed=False, return_knots=False
+):
+    """
+    Interpolates many lines at once. Knots of line i are (N, 2) coords[offsets[i]:offsets[i + 1]].
+    Returns (M, 2) coordinates of all splines and offsets of the splines in them, and (N,) indices
+    of knots in them if return_knots is True. See spline_core.hermite_many().
+    """
+    tolerance, tightness, max_segments, adaptive = interpolation_params(tolerance, tightness, max_segments, adaptive)
+    with profiler.stage("hermite many", len(offsets) - 1):
+        result, result_offsets, knots = hermite_many(
+            coords, offsets, tolerance, tightness, max_segments, adaptive, closed
+        )
+    if return_knots:
+        return result, result_offsets, knots
+    return result, result_offsets
+
+
+def interpolate_stream(xy, tolerance=None, tightness=None, max_segments=None, adaptive=None, closed=False, values=None):
+    """
+    Generator of the spline of (N, 2) knots array xy in blocks of vertices, with interpolated columns of (N, V)
+    values, if given. Keeps only one block of samples in memory, see spline_core.hermite_stream().
+    """
+    tolerance, tightness, max_segments, adaptive = interpolation_params(tolerance, tightness, max_segments, adaptive)
+    return hermite_stream(xy, tolerance, tightness, max_segments, adaptive, closed, values)
+
+
+def interpolate_arcs(xy, tolerance=None, tightness=None, max_segments=None, closed=False):
+    """
+    Circular arcs fitted to the spline of (N, 2) knots array xy within tolerance. Returns vertices of the arcs
+    (start, then middle and end of each arc), indices of the knots in them and mask of straight arcs,
+    see spline_core.hermite_arcs().
+    """
+    tolerance, tightness, max_segments, _ = interpolation_params(tolerance, tightness, max_segments, None)
+    with profiler.stage("hermite arcs", len(xy)):
+        return hermite_arcs(xy, tolerance, tightness, max_segments, closed)
+
+
+def interpolation_params(tolerance, tightness, max_segments, adaptive):
+    """Fills parameters which are None from settings."""
+    settings = spline_settings()
     if tolerance is None:
-        tolerance = QSettings().value(SETTINGS_NAME + "/tolerance", DEFAULT_TOLERANCE, float)
+        tolerance = settings.tolerance
     if tightness is None:
-        tightness = QSettings().value(SETTINGS_NAME + "/tightness", DEFAULT_TIGHTNESS, float)
+        tightness = settings.tightness
     if max_segments is None:
-        max_segments = QSettings().value(SETTINGS_NAME + "/max_segments", DEFAULT_MAX_SEGMENTS, int)
-    points = hermite(points, tolerance, tightness, max_segments)
-    return [QgsPointXY(pt) for pt in points]
+        max_segments = settings.max_segments
+    if adaptive is None:
+        adaptive = settings.adaptive
+    return tolerance, tightness, max_segments, adaptive
 
 
-def hermite(points, tolerance, tightness, max_segments):
+def hermite(points, tolerance, tightness, max_segments, adaptive=False, simplifier=SIMPLIFY_NUMPY):
     npoints = len(points)
     if npoints < 3:
         return list(points)  # return copy
-    output = []  # output points
-
-    # calculate tangents, first and last go in edge direction
-    tangents = [points_tangent_scaled(points[0], points[1], tightness)]
-    for i in range(1, npoints - 1):
-        tangents.append(points_tangent_scaled(points[i - 1], points[i + 1], tightness))
-    tangents.append(points_tangent_scaled(points[-2], points[-1], tightness))
-
-    h1 = lambda s: (2 * (s ** 3)) - (3 * (s ** 2)) + 1
-    h2 = lambda s: 3 * (s ** 2) - 2 * (s ** 3)
-    h3 = lambda s: (s ** 3) - (2 * (s ** 2)) + s
-    h4 = lambda s: (s ** 3) - (s ** 2)
-
-    for i in range(0, npoints - 1):
-        p0 = points[i]
-        p1 = points[i + 1]
-
-        output.append(p0)
-
-        # It would be better to divide each segment to steps according
-        # to tolerance but how to find maximum step size for tolerance?
-        # It should be probably possible for with some math.
-        # step = ???
-        # dist = pointsDist(p0, p1)
-        # if dist == 0 or dist < step:
-        # continue
-        # else:
-        # t = float(step)/dist
-
-        # for now we just make 50 points (more may become slow) and prune them using tolerance
-        t = 1.0 / float(max_segments)
-        s = t
-
-        tmp_points = []
-        output.append(tmp_points)
-        while s < 1:
-            h1p1 = point_scalar(p0, h1(s))
-            h2p2 = point_scalar(p1, h2(s))
-            h3t1 = point_scalar(tangents[i], h3(s))
-            h4t2 = point_scalar(tangents[i + 1], h4(s))
-
-            tmp1 = points_add(h1p1, h2p2)
-            tmp2 = points_add(h3t1, h4t2)
-            tmp = points_add(tmp1, tmp2)
-
-            tmp_points.append(tmp)
-            s = s + t
-
-    output.append(p1)  # last point
-
-    # now we have mix of points and point lists, we clean the lists keeping the digitized points
-    result = []
-    for i in range(len(output)):
-        p = output[i]
-        if type(p) == list:
-            pnts = [output[i - 1]] + p + [output[i + 1]]
-            pnts = simplify_points(pnts, tolerance)
-            result.extend(pnts[1:-1])
-        else:
-            result.append(p)
-
+    with profiler.stage("hermite", npoints):
+        xy = hermite_array(points_to_array(points), tolerance, tightness, max_segments, adaptive, simplifier)
+        return [QgsPointXY(x, y) for x, y in xy]
+
+
+def hermite_array(
+    xy, tolerance, tightness, max_segments, adaptive=False, simplifier=SIMPLIFY_NUMPY, return_knots=False, closed=False
+):
+    """Array version of hermite(), see spline_core.hermite_array(). Uses GEOS if simplifier is SIMPLIFY_GEOS."""
+    xy = np.asarray(xy, dtype=float)
+    if simplifier != SIMPLIFY_GEOS or adaptive or len(xy) < 3:
+        return spline_core.hermite_array(xy, tolerance, tightness, max_segments, adaptive, return_knots, closed)
+    samples = hermite_samples(xy, tightness, max_segments, closed)
+    result, knots = simplify_segments_geos(xy, samples, tolerance)
+    if return_knots:
+        return result, knots
     return result
 
 
+def simplify_segments_geos(xy, samples, tolerance):
+    """
+    Simplifies (N - 1, S, 2) samples between knots xy with GEOS, one segment at a time.
+    Returns (M, 2) array of the simplified line and (N,) array of knot indices in it.
+    """
+    # we clean the sampled points of each segment keeping the digitized points
+    result = [xy[:1]]
+    for i in range(len(samples)):
+        pnts = [QgsPoint(*xy[i])] + [QgsPoint(x, y) for x, y in samples[i]] + [QgsPoint(*xy[i + 1])]
+        pnts = simplify_points(pnts, tolerance)
+        result.append(np.array([(pt.x(), pt.y()) for pt in pnts[1:-1]], dtype=float).reshape(-1, 2))
+        result.append(xy[i + 1 : i + 2])
+    knots = np.cumsum([0] + [len(part) for part in result[1::2]]) + np.arange(len(xy))
+    return np.concatenate(result), knots
+
+
+def points_to_array(points):
+    return np.array([(pt.x(), pt.y()) for pt in points], dtype=float).reshape(-1, 2)
+
+
 def points_tangent_scaled(p1, p2, k):
     x = p2.x() - p1.x()
     y = p2.y() - p1.y()
@@ -119,9 +200,10 @@ def simplify_points(points, tolerance):
         if isinstance(pt, QgsPointXY):
             pt = QgsPoint(pt)
         pts.append(pt)
-    geo = QgsGeometry.fromPolyline(pts)
-    geo = geo.simplify(tolerance)
-    return geo.asPolyline()
+    with profiler.stage("GEOS simplify", len(pts)):
+        geo = QgsGeometry.fromPolyline(pts)
+        geo = geo.simplify(tolerance)
+        return geo.asPolyline()
 
 
 def point_scalar(p, k):
@@ -0,0 +1,173 @@
+"""
+/***************************************************************************
+    Splining of selected features of an editable layer
+                              -------------------
+        begin                : October 2026
+        copyright            : (C) 2026 by the Spline plugin contributors
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+
+Geometries are splined from a snapshot of the layer (its edit buffer included), in a background task for large
+selections, and written back in one edit command - one undo step and one repaint.
+"""
+from itertools import islice
+
+import numpy as np
+
+from qgis.PyQt.QtCore import QCoreApplication
+from qgis.core import QgsFeatureRequest, QgsGeometry, QgsProject, QgsTask, QgsVectorLayerFeatureSource, QgsWkbTypes
+
+from .knot_store import knot_store, spline_record
+from .spline_core import cumulative_length, interpolate_values
+from .spline_interp import interpolate_arcs, interpolate_many
+from .utils import OUTPUT_ARCS, OUTPUT_KNOTS, TENSION_FIELD
+from .wkb import WkbBuilder, read_wkb
+
+# selections of more features are splined in a background task
+TASK_FEATURES = 500
+# features splined at once, all their rings in one interpolate_many() call
+CHUNK_SIZE = 1024
+
+
+def selection_request(fids):
+    return QgsFeatureRequest().setFilterFids(list(fids)).setNoAttributes()
+
+
+def linear_geometry(geom):
+    """geom with its curves (of curved layers, e.g. splines output as arcs before) segmentized."""
+    if QgsWkbTypes.isCurvedType(geom.wkbType()):
+        return QgsGeometry(geom.constGet().segmentize())
+    return geom
+
+
+def spline_features(features, count, is_polygon, output_mode, params, task=None):
+    """
+    Splines not null geometries of count features (iterable of QgsFeature) with params (tolerance, tension,
+    max_segments, adaptive), output_mode must suit the layer (see knot_store.layer_output_mode()). Returns list
+    of (feature id, geometry, changed, record) - record (see KnotStore) is None for features which cannot be
+    edited as splines later (more parts or rings, z or m). With task, its progress is set and None is returned
+    if it is canceled.
+    """
+    tolerance, tension, max_segments, adaptive = params
+    arcs = output_mode == OUTPUT_ARCS
+    min_knots = 2 if arcs else 3
+    features = iter(features)
+    results = []
+    while True:
+        chunk = list(islice(features, CHUNK_SIZE))
+        if not chunk:
+            break
+        chunk = [feature for feature in chunk if not feature.geometry().isNull()]
+        if task is not None:
+            if task.isCanceled():
+                return None
+            task.setProgress(100.0 * len(results) / max(count, 1))
+        linear = [linear_geometry(feature.geometry()) for feature in chunk]
+        geoms = [read_wkb(geom.asWkb().data()) for geom in linear]
+        rings = [ring[:, :2] for geom in geoms for part in geom[3] for ring in part if len(ring) >= min_knots]
+        if output_mode == OUTPUT_KNOTS:
+            splines = iter([])
+        elif arcs:
+            splines = iter([interpolate_arcs(ring, tolerance, tension, max_segments, is_polygon) for ring in rings])
+        else:
+            offsets = np.cumsum([0] + [len(ring) for ring in rings])
+            coords = np.concatenate(rings) if rings else np.empty((0, 2))
+            result, result_offsets, knots = interpolate_many(
+                coords, offsets, tolerance, tension, max_segments, adaptive, is_polygon, return_knots=True
+            )
+            splines = iter(
+                [
+                    (result[result_offsets[i] : result_offsets[i + 1]], knots[offsets[i] : offsets[i + 1]], None)
+                    for i in range(len(rings))
+                ]
+            )
+
+        for feature, linear_geom, (flat_type, has_z, has_m, parts) in zip(chunk, linear, geoms):
+            editable = len(parts) == 1 and len(parts[0]) == 1 and not has_z and not has_m
+            if output_mode == OUTPUT_KNOTS:
+                record = None
+                if editable:
+                    knots = parts[0][0]
+                    record = spline_record(knots, np.arange(len(knots)), output_mode, params, is_polygon)
+                # curves are replaced by the knots
+                curved = QgsWkbTypes.isCurvedType(feature.geometry().wkbType())
+                results.append((feature.id(), linear_geom, curved, record))
+                continue
+            builder = WkbBuilder(flat_type, has_z, has_m, len(parts), curved=arcs)
+            record = None
+            for part in parts:
+                builder.begin_part(len(part))
+                for ring in part:
+                    if len(ring) < min_knots:
+                        vertices, knots, straight = ring, np.arange(len(ring)), np.zeros(0, dtype=bool)
+                    else:
+                        spline_xy, knots, straight = next(splines)
+                        # z and m interpolated along the spline
+                        spline_dist = cumulative_length(spline_xy)
+                        values = [interpolate_values(spline_dist, spline_dist[knots], col) for col in ring[:, 2:].T]
+                        vertices = np.column_stack([spline_xy] + values)
+                    if arcs:
+                        builder.add_arcs(vertices, straight)
+                    else:
+                        builder.add_ring(vertices)
+                    if editable:
+                        record = spline_record(ring, knots, output_mode, params, is_polygon)
+            geom = QgsGeometry()
+            geom.fromWkb(builder.wkb())
+            results.append((feature.id(), geom, True, record))
+    return results
+
+
+def apply_splines(layer, results, output_mode, tension):
+    """
+    Writes the results of spline_features() to layer in one edit command, with the tension in knots output,
+    and stores the knots of the splines.
+    """
+    tension_idx = layer.fields().lookupField(TENSION_FIELD) if output_mode == OUTPUT_KNOTS else -1
+    layer.beginEditCommand(QCoreApplication.translate("spline", "Spline selected features"))
+    for fid, geom, changed, _ in results:
+        # default values are not evaluated again for each feature
+        if changed:
+            layer.changeGeometry(fid, geom, True)
+        if tension_idx >= 0:
+            layer.changeAttributeValue(fid, tension_idx, tension)
+    layer.endEditCommand()
+    knot_store(layer).set_records([(fid, geom, record) for fid, geom, _, record in results if record is not None])
+    layer.triggerRepaint()
+
+
+class SplineSelectionTask(QgsTask):
+    """Splines features of layer in the background, callback(task, result) is called in the main thread."""
+
+    def __init__(self, layer, fids, is_polygon, output_mode, params, callback):
+        super(SplineSelectionTask, self).__init__(
+            QCoreApplication.translate("spline", "Spline selected features"), QgsTask.CanCancel
+        )
+        self.layer_id = layer.id()
+        self.source = QgsVectorLayerFeatureSource(layer)
+        self.fids = fids
+        self.is_polygon = is_polygon
+        self.output_mode = output_mode
+        self.params = params
+        self.callback = callback
+        self.results = None
+
+    def run(self):
+        features = self.source.getFeatures(selection_request(self.fids))
+        self.results = spline_features(features, len(self.fids), self.is_polygon, self.output_mode, self.params, self)
+        return self.results is not None
+
+    def finished(self, result):
+        self.callback(self, result)
+
+    def layer(self):
+        """The layer, None if it was removed meanwhile."""
+        return QgsProject.instance().mapLayer(self.layer_id)
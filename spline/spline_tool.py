@@ -17,9 +17,10 @@
  *                                                                         *
  ***************************************************************************/
 """
-from qgis.PyQt.QtCore import Qt, QSettings
-from qgis.PyQt.QtGui import QCursor, QPixmap, QColor
+from qgis.PyQt.QtCore import Qt, QSettings, QTimer
+from qgis.PyQt.QtGui import QCursor, QGuiApplication, QPixmap, QColor
 from qgis.core import (
+    QgsApplication,
     QgsCoordinateTransform,
     QgsFeature,
     QgsGeometry,
@@ -27,11 +28,62 @@ from qgis.core import (
     QgsPointXY,
     QgsProject,
     QgsSettings,
+    QgsTask,
     QgsWkbTypes,
 )
 from qgis.gui import QgsRubberBand, QgsMapToolEdit, QgsVertexMarker
 
-from .spline_interp import interpolate
+import numpy as np
+
+from .knot_store import knot_store, layer_output_mode, spline_geometry, spline_record
+from .settings import spline_settings
+from .spline_interp import (
+    hermite_array,
+    interpolate_arcs,
+    interpolate_segments,
+    interpolation_params,
+    points_to_array,
+)
+from .utils import OUTPUT_ARCS, OUTPUT_KNOTS, TENSION_FIELD
+
+# refresh rate used if the screen does not report any
+DEFAULT_REFRESH_RATE = 60.0
+# preview tolerance in screen pixels, the commit tolerance is used if it is larger
+PREVIEW_PIXEL_TOLERANCE = 0.5
+# previews needing more samples (segments to recompute times max segments) are interpolated in a background task
+BACKGROUND_SAMPLES = 20000
+
+
+class SplinePreviewTask(QgsTask):
+    """Interpolates segments of a preview from segment first on, see interpolate_segments()."""
+
+    def __init__(self, points, moving_point, first, params, generation, callback):
+        super(SplinePreviewTask, self).__init__("Spline preview", QgsTask.CanCancel)
+        self.points = points
+        self.moving_point = moving_point
+        self.first = first
+        self.params = params
+        self.generation = generation
+        self.callback = callback
+        self.segments = None
+
+    def run(self):
+        # segments are interpolated in blocks, a superseded preview stops at the next block
+        self.segments = []
+        block = max(BACKGROUND_SAMPLES // self.params[2], 1)
+        end = len(self.points) - 1
+        for first in range(self.first, end, block):
+            if self.isCanceled():
+                return False
+            last = min(first + block, end)
+            # a segment depends only on its neighbouring knots
+            self.segments += interpolate_segments(self.points[: last + 2], first, *self.params)[: last - first]
+            self.setProgress(100.0 * (last - self.first) / (end - self.first))
+        return not self.isCanceled()
+
+    def finished(self, result):
+        # called in the main thread
+        self.callback(self, result)
 
 
 class SplineTool(QgsMapToolEdit):
@@ -41,10 +93,10 @@ class SplineTool(QgsMapToolEdit):
         self.canvas = self.iface.mapCanvas()
 
         self.rb = QgsRubberBand(self.canvas, QgsWkbTypes.LineGeometry)
-        self.snap_marker = QgsVertexMarker(self.canvas)
         self.snapping_utils = self.canvas.snappingUtils()
 
         self.points = []  # digitized, not yet interpolated points
+        self.segments = []  # interpolated points inside segments between digitized points
         self.type = QgsWkbTypes.LineGeometry  # layer geometry type
         self.tolerance = None
         self.tightness = None
@@ -80,11 +132,49 @@ class SplineTool(QgsMapToolEdit):
         s = QgsSettings()
         self.snap_col = s.value("/qgis/digitizing/snap_color", QColor("#ff00ff"))
 
+        # single marker, only moved and shown or hidden
+        self.snap_marker = QgsVertexMarker(self.canvas)
+        self.snap_marker.setIconSize(16)
+        self.snap_marker.setIconType(QgsVertexMarker.ICON_BOX)
+        self.snap_marker.setPenWidth(3)
+        self.snap_marker.setColor(self.snap_col)
+        self.snap_marker.hide()
+
+        # mouse moves are coalesced, only the last position is processed once per screen refresh
+        self.move_pos = None
+        self.move_timer = QTimer()
+        self.move_timer.setSingleShot(True)
+        self.move_timer.setInterval(self.refresh_interval())
+        self.move_timer.timeout.connect(self.process_move)
+
+        # background preview interpolation, results of older generations are dropped
+        self.preview_tasks = []  # references of running tasks
+        self.preview_generation = 0
+
+        # preview is interpolated with tolerance derived from the canvas resolution
+        self.preview_tolerance = self.canvas_tolerance()
+        self.canvas.extentsChanged.connect(self.extents_changed)
+
+    @staticmethod
+    def refresh_interval():
+        """Screen refresh interval in milliseconds."""
+        screen = QGuiApplication.primaryScreen()
+        rate = screen.refreshRate() if screen is not None else 0.0
+        return int(1000.0 / (rate if rate > 0 else DEFAULT_REFRESH_RATE))
+
     def canvasMoveEvent(self, event):
+        self.move_pos = event.pos()
+        if not self.move_timer.isActive():
+            self.move_timer.start()
+
+    def process_move(self):
+        if self.move_pos is None:
+            return
         color = QColor(255, 0, 0, 100)
         self.rb.setColor(color)
         self.rb.setWidth(1)
-        point = self.toMapCoordinates(event.pos())
+        point = self.toMapCoordinates(self.move_pos)
+        self.move_pos = None
 
         # try to snap to a feature
         result = self.snapping_utils.snapToMap(point)
@@ -94,12 +184,10 @@ class SplineTool(QgsMapToolEdit):
         else:
             self.update_snap_marker()
 
-        points = list(self.points)
-        points.append(QgsPoint(point))
-        points = interpolate(points)
-        self.set_rubber_band_points(points)
+        self.preview(QgsPoint(point))
 
     def canvasReleaseEvent(self, event):
+        self.cancel_move()
         color = QColor(255, 0, 0, 100)
         self.rb.setColor(color)
         self.rb.setWidth(1)
@@ -111,8 +199,7 @@ class SplineTool(QgsMapToolEdit):
             if result.isValid():
                 point = result.point()
             self.points.append(QgsPoint(point))
-            points = interpolate(self.points)
-            self.set_rubber_band_points(points)
+            self.preview()
         else:
             if len(self.points) >= 2:
                 # refresh without last point
@@ -129,12 +216,91 @@ class SplineTool(QgsMapToolEdit):
         elif e.key() == Qt.Key_Backspace:
             if self.points:
                 self.points.pop()
-            points = interpolate(self.points)
-            self.set_rubber_band_points(points)
+            self.preview()
             self.canvas.refresh()
 
+    def cancel_move(self):
+        self.move_timer.stop()
+        self.move_pos = None
+
     def reset_points(self):
+        self.cancel_preview()
         self.points = []
+        self.segments = []
+
+    def preview(self, moving_point=None):
+        """
+        Shows spline of digitized points and the moving point, if given, in the rubber band. If many segments
+        must be recomputed, they are interpolated in a background task and shown when it finishes, unless
+        a newer preview was requested meanwhile.
+        """
+        self.cancel_preview()
+        points = list(self.points)
+        if moving_point is not None:
+            points.append(moving_point)
+        first = min(len(self.segments), max(len(points) - 3, 0))
+        params = self.preview_params()
+        if (len(points) - 1 - first) * params[2] <= BACKGROUND_SAMPLES:
+            self.set_rubber_band_points(self.spline_points(moving_point))
+            return
+        task = SplinePreviewTask(points, moving_point, first, params, self.preview_generation, self.preview_finished)
+        self.preview_tasks.append(task)
+        QgsApplication.taskManager().addTask(task)
+
+    def preview_finished(self, task, result):
+        self.preview_tasks.remove(task)
+        current = task.generation == self.preview_generation
+        if not result or (not current and (task.moving_point is not None or task.points != self.points)):
+            return
+        if task.params != self.preview_params() or task.first > len(self.segments):
+            return
+        segments = self.segments[: task.first] + task.segments
+        if task.moving_point is None:
+            # digitized points are cached even if the preview is not current anymore
+            self.segments = segments
+        if current:
+            self.set_rubber_band_points(join_segments(task.points, segments))
+
+    def cancel_preview(self):
+        """
+        Drops the result of any preview still being interpolated. Interpolation of digitized points only
+        (without moving point) is not canceled, its segments are cached when it finishes.
+        """
+        self.preview_generation += 1
+        for task in self.preview_tasks:
+            if task.moving_point is not None:
+                task.cancel()
+
+    def preview_params(self):
+        """Interpolation parameters of the preview, see interpolation_params()."""
+        return interpolation_params(self.preview_tolerance, None, None, None)
+
+    def canvas_tolerance(self):
+        """Preview tolerance - the commit tolerance or less than a pixel of the canvas, if it is larger."""
+        tolerance = interpolation_params(None, None, None, None)[0]
+        return max(tolerance, self.canvas.mapUnitsPerPixel() * PREVIEW_PIXEL_TOLERANCE)
+
+    def extents_changed(self):
+        # the preview is recomputed only if the scale changed
+        tolerance = self.canvas_tolerance()
+        if tolerance != self.preview_tolerance:
+            self.preview_tolerance = tolerance
+            self.refresh()
+
+    def spline_points(self, moving_point=None):
+        """
+        Interpolates digitized points and the moving point, if given, with the preview tolerance. Segments are
+        cached and only the last two are recomputed - the tangent of the last but one point depends on the last point.
+        """
+        points = list(self.points)
+        if moving_point is not None:
+            points.append(moving_point)
+        segments = self.segments[: max(len(points) - 3, 0)]
+        segments = segments + interpolate_segments(points, len(segments), *self.preview_params())
+        if moving_point is None:
+            self.segments = segments
+
+        return join_segments(points, segments)
 
     # Create feature from digitized points, i.e. without the last moving point
     # where right click happened. This the same way how core QGIS Add Feature works.
@@ -143,29 +309,36 @@ class SplineTool(QgsMapToolEdit):
         provider = layer.dataProvider()
         fields = provider.fields()
         f = QgsFeature(fields)
-        coords = [QgsPointXY(pt) for pt in interpolate(self.points)]
+        settings = spline_settings()
+        # arcs are added to curved layers only
+        output_mode = layer_output_mode(layer, settings.output_mode)
+        knots = points_to_array(self.points)
+        straight = None  # mask of straight arcs in arcs output
+        if output_mode == OUTPUT_KNOTS:
+            vertices, knot_vertices = knots, np.arange(len(knots))
+        elif output_mode == OUTPUT_ARCS and len(knots) >= 2:
+            vertices, knot_vertices, straight = interpolate_arcs(knots)
+        else:
+            params = interpolation_params(None, None, None, None)
+            vertices, knot_vertices = hermite_array(knots, *params, return_knots=True)
 
         proj = QgsProject.instance()
         if layer.crs() != proj.crs():
             trans_context = proj.transformContext()
             transf = QgsCoordinateTransform(proj.crs(), layer.crs(), trans_context)
-            coords_tmp = coords[:]
-            coords = []
-            for point in coords_tmp:
-                transformed_pt = transf.transform(point)
-                coords.append(transformed_pt)
-
-        # Add geometry to feature
-        if self.is_polygon:
-            g = QgsGeometry.fromPolygonXY([coords])
-        else:
-            g = QgsGeometry.fromPolylineXY(coords)
+            vertices = transform_array(transf, vertices)
+            knots = transform_array(transf, knots)
+
+        # Add geometry to feature, polygons are closed by a straight segment
+        g = spline_geometry(vertices, straight, self.is_polygon)
         f.setGeometry(g)
 
         # Add attribute fields to feature
         for field in fields.toList():
             ix = fields.indexFromName(field.name())
             f[field.name()] = provider.defaultValue(ix)
+        if output_mode == OUTPUT_KNOTS and fields.lookupField(TENSION_FIELD) >= 0:
+            f[TENSION_FIELD] = settings.tightness
 
         layer.beginEditCommand("Feature added")
 
@@ -180,11 +353,15 @@ class SplineTool(QgsMapToolEdit):
                 layer.endEditCommand()
             else:
                 layer.destroyEditCommand()
+                return
+        # knots are kept for editing the spline later
+        knot_store(layer).set_record(f.id(), g, spline_record(knots, knot_vertices, output_mode))
 
     def refresh(self):
+        self.preview_tolerance = self.canvas_tolerance()
+        self.segments = []
         if self.points:
-            points = interpolate(self.points)
-            self.set_rubber_band_points(points)
+            self.preview()
 
     def canvasPressEvent(self, event):
         pass
@@ -204,25 +381,25 @@ class SplineTool(QgsMapToolEdit):
         self.rb.reset(self.type)
 
     def set_rubber_band_points(self, points):
-        self.reset_rubber_band()
-        for point in points:
-            update = point is points[-1]
-            if isinstance(point, QgsPoint):
-                point = QgsPointXY(point)
-            self.rb.addPoint(point, update)
+        """Replaces the rubber band geometry by points (QgsPointXY) in one step."""
+        if not points:
+            self.reset_rubber_band()
+            return
+        if self.type == QgsWkbTypes.PolygonGeometry:
+            geom = QgsGeometry.fromPolygonXY([points])
+        else:
+            geom = QgsGeometry.fromPolylineXY(points)
+        self.rb.setToGeometry(geom)
 
     def update_snap_marker(self, snapped_pt=None):
-        self.canvas.scene().removeItem(self.snap_marker)
         if snapped_pt is None:
+            self.snap_marker.hide()
             return
-        self.snap_marker = QgsVertexMarker(self.canvas)
         self.snap_marker.setCenter(snapped_pt)
-        self.snap_marker.setIconSize(16)
-        self.snap_marker.setIconType(QgsVertexMarker.ICON_BOX)
-        self.snap_marker.setPenWidth(3)
-        self.snap_marker.setColor(self.snap_col)
+        self.snap_marker.show()
 
     def deactivate(self):
+        self.cancel_move()
         self.reset_points()
         self.update_snap_marker()
         self.reset_rubber_band()
@@ -236,3 +413,20 @@ class SplineTool(QgsMapToolEdit):
 
     def isEditTool(self):
         return True
+
+
+def join_segments(points, segments):
+    """QgsPointXY list of knots points with interpolated segments between them."""
+    if not points:
+        return []
+    result = [QgsPointXY(points[0])]
+    for segment, point in zip(segments, points[1:]):
+        result.extend(segment)
+        result.append(QgsPointXY(point))
+    return result
+
+
+def transform_array(transform, xy):
+    """(N, 2) array of points xy transformed with QgsCoordinateTransform."""
+    points = [transform.transform(QgsPointXY(x, y)) for x, y in xy]
+    return np.array([(pt.x(), pt.y()) for pt in points], dtype=float).reshape(-1, 2)
@@ -23,12 +23,17 @@ from qgis.PyQt.QtCore import QSettings, QTranslator, QCoreApplication
 from qgis.PyQt.QtGui import QIcon
 from qgis.PyQt.QtWidgets import QAction
 
-from qgis.core import QgsWkbTypes, QgsMapLayerType
+from qgis.core import Qgis, QgsWkbTypes, QgsMapLayerType
 from qgis.core import QgsApplication
 from .processing_provider.provider import Provider as proc_provider
 
+from .knot_store import layer_output_mode
+from .spline_edit_tool import SplineEditTool
+from .spline_interp import interpolation_params
+from .spline_selection import TASK_FEATURES, SplineSelectionTask, apply_splines, selection_request, spline_features
 from .spline_tool import SplineTool
 from .settingsdialog import SettingsDialog
+from .settings import spline_settings
 from .utils import icon_path
 
 
@@ -46,10 +51,14 @@ class SplinePlugin(object):
             QCoreApplication.installTranslator(self.translator)
 
         self.tool = SplineTool(self.iface)
+        self.edit_tool = SplineEditTool(self.iface)
         self.connected_layer = None
         self.settings_dialog = None
         self.action_settings = None
         self.action_spline = None
+        self.action_edit = None
+        self.action_selected = None
+        self.selection_task = None
 
     def initProcessing(self):
         self.proc_provider = proc_provider()
@@ -73,6 +82,27 @@ class SplinePlugin(object):
         self.action_spline.setEnabled(False)
         self.action_spline.setCheckable(True)
 
+        self.action_edit = QAction(
+            QgsApplication.getThemeIcon("/mActionVertexTool.svg"),
+            QCoreApplication.translate("spline", "Edit Splines"),
+            self.iface.mainWindow(),
+        )
+        self.action_edit.setObjectName("actionSplineEdit")
+        self.action_edit.setEnabled(False)
+        self.action_edit.setCheckable(True)
+        self.action_edit.triggered.connect(self.edit)
+        # the tool checks and unchecks the action when it is set and unset
+        self.edit_tool.setAction(self.action_edit)
+
+        self.action_selected = QAction(
+            QgsApplication.getThemeIcon("/mAlgorithmSmooth.svg"),
+            QCoreApplication.translate("spline", "Spline Selected Features"),
+            self.iface.mainWindow(),
+        )
+        self.action_selected.setObjectName("actionSplineSelected")
+        self.action_selected.setEnabled(False)
+        self.action_selected.triggered.connect(self.spline_selected)
+
         # Connect to signals for button behaviour
         self.action_spline.triggered.connect(self.digitize)
         self.iface.currentLayerChanged.connect(self.layer_changed)
@@ -82,10 +112,16 @@ class SplinePlugin(object):
 
         # Add actions to the toolbar
         self.iface.addToolBarIcon(self.action_spline)
+        self.iface.addToolBarIcon(self.action_edit)
+        self.iface.addToolBarIcon(self.action_selected)
 
     def unload(self):
         QgsApplication.processingRegistry().removeProvider(self.proc_provider)
         self.iface.removeToolBarIcon(self.action_spline)
+        self.iface.removeToolBarIcon(self.action_edit)
+        self.iface.removeToolBarIcon(self.action_selected)
+        if self.selection_task is not None:
+            self.selection_task.cancel()
         self.iface.removePluginVectorMenu(u"Digitize Spline", self.action_settings)
 
     def open_settings(self):
@@ -97,6 +133,45 @@ class SplinePlugin(object):
         self.canvas.setMapTool(self.tool)
         self.action_spline.setChecked(True)
 
+    def edit(self):
+        self.canvas.setMapTool(self.edit_tool)
+
+    def spline_selected(self):
+        """Splines the selected features of the active layer, in a background task if there are many."""
+        layer = self.iface.activeLayer()
+        title = QCoreApplication.translate("spline", "Spline")
+        fids = layer.selectedFeatureIds()
+        if not fids:
+            message = QCoreApplication.translate("spline", "No features selected.")
+            self.iface.messageBar().pushMessage(title, message, Qgis.Info)
+            return
+        if self.selection_task is not None:
+            message = QCoreApplication.translate("spline", "Selected features are being splined already.")
+            self.iface.messageBar().pushMessage(title, message, Qgis.Info)
+            return
+        is_polygon = layer.geometryType() == QgsWkbTypes.PolygonGeometry
+        # arcs are written to curved layers only
+        output_mode = layer_output_mode(layer, spline_settings().output_mode)
+        params = interpolation_params(None, None, None, None)
+        if len(fids) <= TASK_FEATURES:
+            features = layer.getFeatures(selection_request(fids))
+            results = spline_features(features, len(fids), is_polygon, output_mode, params)
+            apply_splines(layer, results, output_mode, params[1])
+            return
+        self.selection_task = SplineSelectionTask(layer, fids, is_polygon, output_mode, params, self.selection_finished)
+        QgsApplication.taskManager().addTask(self.selection_task)
+
+    def selection_finished(self, task, result):
+        self.selection_task = None
+        layer = task.layer()
+        if not result or layer is None:
+            return
+        if not layer.isEditable():
+            message = QCoreApplication.translate("spline", "Editing was stopped, splines were not written.")
+            self.iface.messageBar().pushMessage(QCoreApplication.translate("spline", "Spline"), message, Qgis.Warning)
+            return
+        apply_splines(layer, task.results, task.output_mode, task.params[1])
+
     def is_active_layer_for_spline(self):
         layer = self.iface.activeLayer()
         if layer is None:
@@ -113,13 +188,18 @@ class SplinePlugin(object):
     def enable_action(self):
         self.action_spline.setEnabled(False)
         self.action_spline.setChecked(False)
+        self.action_edit.setEnabled(False)
+        self.action_selected.setEnabled(False)
         if self.is_active_layer_for_spline():
             if self.iface.activeLayer().isEditable():
                 self.action_spline.setEnabled(True)
+                self.action_edit.setEnabled(True)
+                self.action_selected.setEnabled(True)
 
     def layer_changed(self):
         self.deactivate()
         self.tool.deactivate()
+        self.edit_tool.reset()
         self.enable_action()
         self.connect_layer()
 
@@ -147,4 +227,5 @@ class SplinePlugin(object):
         self.action_spline.setChecked(False)
 
     def settings_changed(self):
+        spline_settings().load()
         self.tool.refresh()
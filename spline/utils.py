@@ -23,6 +23,15 @@ SETTINGS_NAME = "SplinePlugin"
 DEFAULT_TOLERANCE = 1.0
 DEFAULT_TIGHTNESS = 0.5
 DEFAULT_MAX_SEGMENTS = 50
+DEFAULT_ADAPTIVE = False
+
+# output of splines: densified lines, circular arcs (curved geometries) or the knots with the tension attribute
+OUTPUT_LINES = 0
+OUTPUT_ARCS = 1
+OUTPUT_KNOTS = 2
+OUTPUT_MODES = ["Lines", "Circular arcs", "Knots and tension"]
+DEFAULT_OUTPUT_MODE = OUTPUT_LINES
+TENSION_FIELD = "spline_tension"
 
 
 def icon_path(icon_filename):
@@ -0,0 +1,240 @@
+"""
+/***************************************************************************
+    Reading and writing of line and polygon WKB as NumPy arrays
+                              -------------------
+        begin                : October 2026
+        copyright            : (C) 2026 by the Spline plugin contributors
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+
+Vertices are read as (N, dim) views into the WKB buffer (dim is 2, 3 or 4 for x, y and optional z and m),
+no Python objects are created per vertex. Only NumPy is imported here, like in spline_core.
+"""
+import struct
+
+import numpy as np
+
+WKB_LINESTRING = 2
+WKB_POLYGON = 3
+WKB_MULTILINESTRING = 5
+WKB_MULTIPOLYGON = 6
+WKB_CIRCULARSTRING = 8
+WKB_COMPOUNDCURVE = 9
+WKB_CURVEPOLYGON = 10
+WKB_MULTICURVE = 11
+WKB_MULTISURFACE = 12
+
+# flags of 2.5D types used by QGIS (and EWKB)
+WKB_Z_FLAG = 0x80000000
+WKB_M_FLAG = 0x40000000
+
+
+def wkb_type_info(wkb_type):
+    """Returns flat type, has_z and has_m of ISO WKB type (2.5D and EWKB flags are understood too)."""
+    iso = wkb_type & 0x0FFFFFFF
+    has_z = bool(wkb_type & WKB_Z_FLAG) or iso // 1000 in (1, 3)
+    has_m = bool(wkb_type & WKB_M_FLAG) or iso // 1000 in (2, 3)
+    return iso % 1000, has_z, has_m
+
+
+def wkb_type(flat_type, has_z, has_m):
+    """ISO WKB type."""
+    return flat_type + (1000 if has_z else 0) + (2000 if has_m else 0)
+
+
+def read_wkb(data):
+    """
+    Reads line or polygon WKB. Returns flat type, has_z, has_m and list of parts, each part is a list of its rings
+    (lines have just one), each ring is (N, dim) array viewing data.
+    """
+    parts = []
+    flat_type, has_z, has_m, _ = _read_geometry(data, 0, parts)
+    return flat_type, has_z, has_m, parts
+
+
+def _read_geometry(data, offset, parts):
+    endian = "<" if data[offset] == 1 else ">"
+    (geom_type,) = struct.unpack_from(endian + "I", data, offset + 1)
+    offset += 5
+    flat_type, has_z, has_m = wkb_type_info(geom_type)
+    dim = 2 + has_z + has_m
+    if flat_type in (WKB_MULTILINESTRING, WKB_MULTIPOLYGON):
+        (count,) = struct.unpack_from(endian + "I", data, offset)
+        offset += 4
+        for _ in range(count):
+            _, _, _, offset = _read_geometry(data, offset, parts)
+    elif flat_type == WKB_LINESTRING:
+        ring, offset = _read_ring(data, offset, endian, dim)
+        parts.append([ring])
+    elif flat_type == WKB_POLYGON:
+        (count,) = struct.unpack_from(endian + "I", data, offset)
+        offset += 4
+        rings = []
+        for _ in range(count):
+            ring, offset = _read_ring(data, offset, endian, dim)
+            rings.append(ring)
+        parts.append(rings)
+    else:
+        raise ValueError("Unsupported WKB geometry type {}".format(geom_type))
+    return flat_type, has_z, has_m, offset
+
+
+def _read_ring(data, offset, endian, dim):
+    (count,) = struct.unpack_from(endian + "I", data, offset)
+    offset += 4
+    ring = np.frombuffer(data, dtype=endian + "f8", count=count * dim, offset=offset).reshape(count, dim)
+    return ring, offset + count * dim * 8
+
+
+def read_arcs(data):
+    """
+    Reads curved WKB written with WkbBuilder.add_arcs(), or line WKB. Returns flat type, has_z, has_m and list of
+    parts, each part is a list of its rings, each ring is (vertices, straight) like the arguments of add_arcs().
+    """
+    parts = []
+    flat_type, has_z, has_m, _ = _read_curved(data, 0, parts)
+    return flat_type, has_z, has_m, parts
+
+
+def _read_curved(data, offset, parts):
+    endian = "<" if data[offset] == 1 else ">"
+    (geom_type,) = struct.unpack_from(endian + "I", data, offset + 1)
+    flat_type, has_z, has_m = wkb_type_info(geom_type)
+    if flat_type in (WKB_MULTICURVE, WKB_MULTISURFACE, WKB_MULTILINESTRING, WKB_MULTIPOLYGON):
+        (count,) = struct.unpack_from(endian + "I", data, offset + 5)
+        offset += 9
+        for _ in range(count):
+            _, _, _, offset = _read_curved(data, offset, parts)
+    elif flat_type in (WKB_CURVEPOLYGON, WKB_POLYGON):
+        (count,) = struct.unpack_from(endian + "I", data, offset + 5)
+        offset += 9
+        rings = []
+        for _ in range(count):
+            ring, offset = _read_arcs_ring(data, offset, flat_type == WKB_POLYGON, endian, 2 + has_z + has_m)
+            rings.append(ring)
+        parts.append(rings)
+    else:
+        ring, offset = _read_arcs_ring(data, offset, False, endian, 2 + has_z + has_m)
+        parts.append([ring])
+    return flat_type, has_z, has_m, offset
+
+
+def _read_arcs_ring(data, offset, headless, endian, dim):
+    # ring of a polygon has no header, other rings are curves with one
+    if headless:
+        curves = [(WKB_LINESTRING, offset)]
+    else:
+        (geom_type,) = struct.unpack_from(endian + "I", data, offset + 1)
+        curves = [(wkb_type_info(geom_type)[0], offset + 5)]
+    if curves[0][0] == WKB_COMPOUNDCURVE:
+        (count,) = struct.unpack_from(endian + "I", data, curves[0][1])
+        offset = curves[0][1] + 4
+        curves = []
+        for _ in range(count):
+            (geom_type,) = struct.unpack_from(endian + "I", data, offset + 1)
+            curves.append((wkb_type_info(geom_type)[0], offset + 5))
+            offset = curves[-1][1] + 4 + struct.unpack_from(endian + "I", data, offset + 5)[0] * dim * 8
+    vertices = []
+    straight = []
+    for curve_type, curve_offset in curves:
+        if curve_type not in (WKB_LINESTRING, WKB_CIRCULARSTRING):
+            raise ValueError("Unsupported WKB curve type {}".format(curve_type))
+        points, offset = _read_ring(data, curve_offset, endian, dim)
+        if curve_type == WKB_LINESTRING:
+            # straight arcs with middle vertices in the middle of the lines
+            arcs = np.empty((2 * len(points) - 1, dim))
+            arcs[0::2] = points
+            arcs[1::2] = (points[:-1] + points[1:]) / 2.0
+            points = arcs
+        vertices.append(points[1:] if vertices else points)
+        straight.append(np.full((len(points) - 1) // 2, curve_type == WKB_LINESTRING))
+    return (np.concatenate(vertices), np.concatenate(straight)), offset
+
+
+def curve_type(flat_type):
+    """Curved flat type of line or polygon flat type."""
+    return {
+        WKB_LINESTRING: WKB_COMPOUNDCURVE,
+        WKB_POLYGON: WKB_CURVEPOLYGON,
+        WKB_MULTILINESTRING: WKB_MULTICURVE,
+        WKB_MULTIPOLYGON: WKB_MULTISURFACE,
+    }[flat_type]
+
+
+class WkbBuilder(object):
+    """
+    Writes little endian WKB of flat_type incrementally, part by part and ring by ring. Vertices of a ring may be
+    added in blocks, the ring's vertex count is filled in when it ends. Block arrays must have
+    2 + has_z + has_m columns. With curved, the geometry is of curve_type(flat_type) and its rings are
+    added by add_arcs().
+    """
+
+    def __init__(self, flat_type, has_z, has_m, nparts, curved=False):
+        self.flat_type = flat_type
+        self.has_z = has_z
+        self.has_m = has_m
+        self.curved = curved
+        self.data = bytearray()
+        self.count_offset = None  # offset of the vertex count of the current ring
+        self.vertices = 0  # vertices in all rings
+        self.ring_vertices = 0
+        if flat_type in (WKB_MULTILINESTRING, WKB_MULTIPOLYGON):
+            self.data += _header(curve_type(flat_type) if curved else flat_type, has_z, has_m)
+            self.data += struct.pack("<I", nparts)
+
+    def begin_part(self, nrings):
+        if self.flat_type in (WKB_POLYGON, WKB_MULTIPOLYGON):
+            polygon_type = WKB_CURVEPOLYGON if self.curved else WKB_POLYGON
+            self.data += _header(polygon_type, self.has_z, self.has_m) + struct.pack("<I", nrings)
+        elif not self.curved:
+            self.data += _header(WKB_LINESTRING, self.has_z, self.has_m)
+
+    def begin_ring(self):
+        self.count_offset = len(self.data)
+        self.ring_vertices = 0
+        self.data += struct.pack("<I", 0)
+
+    def add_vertices(self, block):
+        self.data += np.ascontiguousarray(block, dtype="<f8").tobytes()
+        self.ring_vertices += len(block)
+
+    def end_ring(self):
+        struct.pack_into("<I", self.data, self.count_offset, self.ring_vertices)
+        self.vertices += self.ring_vertices
+
+    def add_ring(self, ring):
+        self.begin_ring()
+        self.add_vertices(ring)
+        self.end_ring()
+
+    def add_arcs(self, vertices, straight):
+        """
+        Adds ring of K arcs as a compound curve: (2K + 1, dim) vertices are the start, then the middle and end
+        of each arc, straight arcs of (K,) mask are joined into line strings without their middle vertices.
+        """
+        runs = np.flatnonzero(np.diff(straight.astype(np.int8))) + 1
+        bounds = np.concatenate(([0], runs, [len(straight)])) if len(straight) else np.zeros(1, dtype=int)
+        self.data += _header(WKB_COMPOUNDCURVE, self.has_z, self.has_m) + struct.pack("<I", len(bounds) - 1)
+        for start, end in zip(bounds[:-1], bounds[1:]):
+            if straight[start]:
+                part_type, curve = WKB_LINESTRING, vertices[2 * start : 2 * end + 1 : 2]
+            else:
+                part_type, curve = WKB_CIRCULARSTRING, vertices[2 * start : 2 * end + 1]
+            self.data += _header(part_type, self.has_z, self.has_m) + struct.pack("<I", len(curve))
+            self.data += np.ascontiguousarray(curve, dtype="<f8").tobytes()
+            self.vertices += len(curve)
+
+    def wkb(self):
+        return bytes(self.data)
+
+
+def _header(flat_type, has_z, has_m):
+    return struct.pack("<BI", 1, wkb_type(flat_type, has_z, has_m))
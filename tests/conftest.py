@@ -0,0 +1,5 @@
+import os
+import sys
+
+# the spline package is imported from the repository root, its core modules do not need QGIS
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
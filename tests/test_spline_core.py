@@ -0,0 +1,236 @@
+"""
+Tests of spline_core, which needs only NumPy:
+
+    python -m pytest tests
+"""
+import numpy as np
+import pytest
+
+from spline import spline_core
+
+TOLERANCE = 0.05
+TIGHTNESS = 0.5
+MAX_SEGMENTS = 20
+
+
+def random_line(n, seed=0, closed=False):
+    rng = np.random.default_rng(seed)
+    angle = np.cumsum(rng.normal(scale=0.4, size=n))
+    step = rng.uniform(0.5, 3.0, size=n)
+    xy = np.cumsum(np.column_stack((np.cos(angle) * step, np.sin(angle) * step)), axis=0)
+    if closed:
+        xy[-1] = xy[0]
+    return xy
+
+
+def brute_douglas_peucker(xy, tolerance, first, last, keep):
+    if last - first < 2:
+        return
+    inner = last - first - 1
+    dist = spline_core.points_segment_distance(
+        xy[first + 1 : last], np.repeat(xy[first : first + 1], inner, 0), np.repeat(xy[last : last + 1], inner, 0)
+    )
+    farthest = int(np.argmax(dist))
+    if dist[farthest] > tolerance:
+        keep[first + 1 + farthest] = True
+        brute_douglas_peucker(xy, tolerance, first, first + 1 + farthest, keep)
+        brute_douglas_peucker(xy, tolerance, first + 1 + farthest, last, keep)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_douglas_peucker_matches_recursion(seed):
+    xy = random_line(300, seed)
+    fixed = np.array([0, 50, 51, 120, 299])
+    expected = np.zeros(len(xy), dtype=bool)
+    expected[fixed] = True
+    for first, last in zip(fixed[:-1], fixed[1:]):
+        brute_douglas_peucker(xy, 0.5, first, last, expected)
+    np.testing.assert_array_equal(spline_core.douglas_peucker(xy, 0.5, fixed), expected)
+
+
+@pytest.mark.parametrize("adaptive", [False, True])
+@pytest.mark.parametrize("closed", [False, True])
+def test_hermite_many_matches_hermite_array(adaptive, closed):
+    lines = [random_line(n, seed, closed) for seed, n in enumerate([2, 3, 10, 57, 1, 4])]
+    offsets = np.cumsum([0] + [len(xy) for xy in lines])
+    result, result_offsets, knots = spline_core.hermite_many(
+        np.concatenate(lines), offsets, TOLERANCE, TIGHTNESS, MAX_SEGMENTS, adaptive, closed
+    )
+    for i, xy in enumerate(lines):
+        if len(xy) < 3:
+            expected, expected_knots = xy, np.arange(len(xy))
+        else:
+            expected, expected_knots = spline_core.hermite_array(
+                xy, TOLERANCE, TIGHTNESS, MAX_SEGMENTS, adaptive, True, closed
+            )
+        np.testing.assert_allclose(result[result_offsets[i] : result_offsets[i + 1]], expected)
+        np.testing.assert_array_equal(knots[offsets[i] : offsets[i + 1]] - result_offsets[i], expected_knots)
+
+
+@pytest.mark.parametrize("adaptive", [False, True])
+@pytest.mark.parametrize("closed", [False, True])
+def test_hermite_stream_matches_hermite_array(adaptive, closed):
+    xy = random_line(1000, 1, closed)
+    values = np.column_stack((np.linspace(0, 100, len(xy)), np.linspace(5, -5, len(xy))))
+    blocks = list(
+        spline_core.hermite_stream(xy, TOLERANCE, TIGHTNESS, MAX_SEGMENTS, adaptive, closed, values, block_size=64)
+    )
+    streamed = np.concatenate(blocks)
+    expected, knots = spline_core.hermite_array(xy, TOLERANCE, TIGHTNESS, MAX_SEGMENTS, adaptive, True, closed)
+    np.testing.assert_allclose(streamed[:, :2], expected)
+    spline_dist = spline_core.cumulative_length(expected)
+    for col in range(values.shape[1]):
+        interpolated = spline_core.interpolate_values(spline_dist, spline_dist[knots], values[:, col])
+        np.testing.assert_allclose(streamed[:, 2 + col], interpolated, atol=1e-9)
+
+
+@pytest.mark.parametrize("adaptive", [False, True])
+@pytest.mark.parametrize(
+    "start, end, new",
+    [
+        (5, 6, [[1.0, 1.0]]),  # move
+        (5, 5, [[2.0, -1.0]]),  # insert
+        (5, 6, []),  # delete
+        (0, 1, [[-1.0, 0.5]]),  # first knot
+        (19, 20, [[3.0, 3.0]]),  # last knot
+        (8, 12, [[0.0, 0.0], [1.0, 2.0]]),  # replace a range
+    ],
+)
+def test_splice_spline_matches_recompute(adaptive, start, end, new):
+    xy = random_line(20, 2)
+    spline, knots = spline_core.hermite_array(xy, TOLERANCE, TIGHTNESS, MAX_SEGMENTS, adaptive, True)
+    new_xy, result, result_knots = spline_core.splice_spline(
+        xy, spline, knots, start, end, new, TOLERANCE, TIGHTNESS, MAX_SEGMENTS, adaptive
+    )
+    expected, expected_knots = spline_core.hermite_array(new_xy, TOLERANCE, TIGHTNESS, MAX_SEGMENTS, adaptive, True)
+    np.testing.assert_allclose(result, expected)
+    np.testing.assert_array_equal(result_knots, expected_knots)
+
+
+def test_adaptive_straight_line_uneven_knots():
+    xy = np.array([[x, 0.0] for x in [0, 1, 10, 11, 20, 21, 30]])
+    assert len(spline_core.hermite_array(xy, 0.1, TIGHTNESS, 50, adaptive=True)) == len(xy)
+
+
+def polyline_distance(points, line):
+    # distance of each point to the nearest segment of the line
+    distance = np.full(len(points), np.inf)
+    for a, b in zip(line[:-1], line[1:]):
+        ends = np.repeat(a[np.newaxis], len(points), 0), np.repeat(b[np.newaxis], len(points), 0)
+        distance = np.minimum(distance, spline_core.points_segment_distance(points, *ends))
+    return distance
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_adaptive_stays_within_tolerance(seed):
+    xy = np.random.default_rng(seed).uniform(0, 100, (6, 2))
+    result = spline_core.hermite_array(xy, 0.1, TIGHTNESS, 1000, adaptive=True)
+    dense, _ = spline_core.hermite_dense(xy, TIGHTNESS, 2000)
+    assert polyline_distance(dense, result).max() <= 0.1
+
+
+def test_adaptive_uneven_knots_within_tolerance():
+    xy = np.array([[0.0, 0.0], [1.0, 0.0], [100.0, 5.0], [0.0, 10.0]])
+    result = spline_core.hermite_array(xy, 0.1, TIGHTNESS, 1000, adaptive=True)
+    dense, _ = spline_core.hermite_dense(xy, TIGHTNESS, 2000)
+    assert polyline_distance(dense, result).max() <= 0.1
+
+
+def arc_distance(points, start, middle, end, straight):
+    # distance of each point to the arc from start through middle to end
+    ends = np.repeat(start[np.newaxis], len(points), 0), np.repeat(end[np.newaxis], len(points), 0)
+    if straight:
+        return spline_core.points_segment_distance(points, *ends)
+    center, radius = spline_core._circle(start[np.newaxis], middle[np.newaxis], end[np.newaxis])
+    angle = np.arctan2(*(np.vstack((start, middle, end, points)) - center).T[::-1])
+    direction = 1.0 if (angle[1] - angle[0]) % (2 * np.pi) < (angle[2] - angle[0]) % (2 * np.pi) else -1.0
+    relative = direction * (angle - angle[0]) % (2 * np.pi)
+    on_arc = relative[3:] <= relative[2]
+    to_ends = np.minimum(np.hypot(*(points - start).T), np.hypot(*(points - end).T))
+    return np.where(on_arc, np.abs(np.hypot(*(points - center).T) - radius), to_ends)
+
+
+@pytest.mark.parametrize("closed", [False, True])
+@pytest.mark.parametrize("seed", range(3))
+def test_fit_arcs_within_tolerance(seed, closed):
+    xy = random_line(15, seed, closed) * 20
+    dense, fixed = spline_core.hermite_dense(xy, TIGHTNESS, MAX_SEGMENTS, closed)
+    vertices, knots, straight = spline_core.fit_arcs(dense, fixed, TOLERANCE)
+    assert len(vertices) == 2 * len(straight) + 1
+    np.testing.assert_array_equal(vertices[knots], xy)
+    # each arc replaces the dense vertices between its ends
+    ends = np.flatnonzero((dense[:, np.newaxis] == vertices[np.newaxis, ::2]).all(axis=2).any(axis=1))
+    assert len(ends) == len(straight) + 1
+    for i, is_straight in enumerate(straight):
+        points = dense[ends[i] : ends[i + 1] + 1]
+        assert arc_distance(points, *vertices[2 * i : 2 * i + 3], is_straight).max() <= TOLERANCE
+    assert straight.any() and not straight.all()
+
+
+def test_repeated_vertices_do_not_self_intersect():
+    xy = np.array([[0.0, 0.0], [10.0, 0.0], [10.0, 0.0], [20.0, 0.0], [30.0, 0.0]])
+    assert not spline_core.self_intersects([xy])
+    for adaptive in (False, True):
+        assert not spline_core.self_intersects([spline_core.hermite_array(xy, 0.1, TIGHTNESS, 50, adaptive)])
+
+
+def test_self_intersects():
+    assert spline_core.self_intersects([np.array([[0.0, 0.0], [10.0, 0.0], [10.0, 10.0], [5.0, -5.0]])])
+    square = np.array([[0.0, 0.0], [10.0, 0.0], [10.0, 10.0], [0.0, 10.0], [0.0, 0.0]])
+    assert not spline_core.self_intersects([square], closed=True)
+
+
+def test_self_intersects_closed_line():
+    # a closed line (contour) ends where it starts, its first and last segment are neighbours
+    square = np.array([[0.0, 0.0], [10.0, 0.0], [10.0, 10.0], [0.0, 10.0], [0.0, 0.0]])
+    assert spline_core.self_intersects([square])
+    assert not spline_core.self_intersects([square], closed=True)
+    for adaptive in (False, True):
+        spline = spline_core.hermite_array(square, 0.1, TIGHTNESS, 50, adaptive, closed=True)
+        assert not spline_core.self_intersects([spline], closed=True)
+    figure_eight = np.array([[0.0, 0.0], [10.0, 10.0], [10.0, 0.0], [0.0, 10.0], [0.0, 0.0]])
+    assert spline_core.self_intersects([figure_eight], closed=True)
+
+
+def brute_smoothing_spline(xy, smoothing):
+    h = np.hypot(*np.diff(xy, axis=0).T)
+    h = h / h.mean()
+    n = len(xy)
+    q = np.zeros((n, n - 2))
+    r = np.zeros((n - 2, n - 2))
+    for j in range(1, n - 1):
+        q[j - 1, j - 1], q[j, j - 1], q[j + 1, j - 1] = 1 / h[j - 1], -1 / h[j - 1] - 1 / h[j], 1 / h[j]
+        r[j - 1, j - 1] = (h[j - 1] + h[j]) / 3
+        if j < n - 2:
+            r[j - 1, j] = r[j, j - 1] = h[j] / 6
+    gamma = np.linalg.solve(r + smoothing * q.T @ q, q.T @ xy)
+    return xy - smoothing * q @ gamma
+
+
+@pytest.mark.parametrize("n", [3, 4, 10, 57])
+@pytest.mark.parametrize("smoothing", [0.01, 1.0, 100.0, 1e5])
+def test_smoothing_spline_matches_dense_solve(n, smoothing):
+    xy = random_line(n, n)
+    np.testing.assert_allclose(
+        spline_core.smoothing_spline(xy, smoothing), brute_smoothing_spline(xy, smoothing), atol=1e-8
+    )
+
+
+def test_smooth_knots_reduces_noisy_line():
+    rng = np.random.default_rng(0)
+    x = np.linspace(0, 200, 5000)
+    xy = np.column_stack((x, 10 * np.sin(x / 10))) + rng.normal(scale=0.3, size=(len(x), 2))
+    idx, knots = spline_core.smooth_knots(xy, 1000.0, 0.5)
+    assert len(knots) < len(xy) / 50
+    assert idx[0] == 0 and idx[-1] == len(xy) - 1
+    assert np.abs(knots[:, 1] - 10 * np.sin(knots[:, 0] / 10)).max() < 1.0
+
+
+def test_smooth_knots_closed_ring_stays_closed():
+    rng = np.random.default_rng(1)
+    angle = np.linspace(0, 2 * np.pi, 500)
+    ring = np.column_stack((np.cos(angle), np.sin(angle))) * 100 + rng.normal(scale=0.5, size=(500, 2))
+    ring[-1] = ring[0]
+    _, knots = spline_core.smooth_knots(ring, 100.0, 0.2, closed=True)
+    np.testing.assert_array_equal(knots[0], knots[-1])
+    assert np.abs(np.hypot(*knots.T) - 100).max() < 1.0
@@ -0,0 +1,147 @@
+"""
+Tests of wkb, which needs only NumPy:
+
+    python -m pytest tests
+"""
+import struct
+
+import numpy as np
+import pytest
+
+from spline import wkb
+
+
+def random_ring(n, dim, seed):
+    return np.random.default_rng(seed).uniform(-100, 100, (n, dim))
+
+
+def build(flat_type, has_z, has_m, parts, block=3):
+    builder = wkb.WkbBuilder(flat_type, has_z, has_m, len(parts))
+    for rings in parts:
+        builder.begin_part(len(rings))
+        for ring in rings:
+            builder.begin_ring()
+            for start in range(0, len(ring), block):
+                builder.add_vertices(ring[start : start + block])
+            builder.end_ring()
+    return builder.wkb()
+
+
+@pytest.mark.parametrize("has_z, has_m", [(False, False), (True, False), (False, True), (True, True)])
+@pytest.mark.parametrize(
+    "flat_type, shape",
+    [
+        (wkb.WKB_LINESTRING, [[7]]),
+        (wkb.WKB_MULTILINESTRING, [[5], [2], [9]]),
+        (wkb.WKB_POLYGON, [[8, 4, 5]]),
+        (wkb.WKB_MULTIPOLYGON, [[6], [10, 4]]),
+    ],
+)
+def test_read_wkb_round_trip(flat_type, shape, has_z, has_m):
+    dim = 2 + has_z + has_m
+    parts = [[random_ring(n, dim, 10 * i + j) for j, n in enumerate(rings)] for i, rings in enumerate(shape)]
+    data = build(flat_type, has_z, has_m, parts)
+    assert struct.unpack_from("<I", data, 1)[0] == wkb.wkb_type(flat_type, has_z, has_m)
+    read_type, read_z, read_m, read_parts = wkb.read_wkb(data)
+    assert (read_type, read_z, read_m) == (flat_type, has_z, has_m)
+    assert [len(rings) for rings in read_parts] == [len(rings) for rings in parts]
+    for rings, read_rings in zip(parts, read_parts):
+        for ring, read_ring in zip(rings, read_rings):
+            np.testing.assert_array_equal(read_ring, ring)
+
+
+def test_read_wkb_big_endian_and_25d_flags():
+    lines = [random_ring(4, 3, 1), random_ring(3, 3, 2)]
+    # 2.5D multi line string with z, big endian
+    data = struct.pack(">BII", 0, wkb.WKB_MULTILINESTRING | wkb.WKB_Z_FLAG, len(lines))
+    for line in lines:
+        data += struct.pack(">BII", 0, wkb.WKB_LINESTRING | wkb.WKB_Z_FLAG, len(line)) + line.astype(">f8").tobytes()
+    flat_type, has_z, has_m, parts = wkb.read_wkb(data)
+    assert (flat_type, has_z, has_m) == (wkb.WKB_MULTILINESTRING, True, False)
+    for line, rings in zip(lines, parts):
+        np.testing.assert_array_equal(rings[0], line)
+    # written back as little endian ISO WKB
+    data = build(flat_type, has_z, has_m, parts)
+    assert data[:5] == struct.pack("<BI", 1, 1000 + wkb.WKB_MULTILINESTRING)
+    for line, rings in zip(lines, wkb.read_wkb(data)[3]):
+        np.testing.assert_array_equal(rings[0], line)
+
+
+def random_arcs(straight, dim, seed):
+    # arc ends and middles; middles of straight arcs are in the middle of their chords, as read_arcs() makes them
+    vertices = random_ring(2 * len(straight) + 1, dim, seed)
+    middles = (vertices[0:-1:2] + vertices[2::2]) / 2.0
+    vertices[1::2][straight] = middles[straight]
+    return vertices
+
+
+@pytest.mark.parametrize("has_z, has_m", [(False, False), (True, True)])
+@pytest.mark.parametrize(
+    "flat_type, nparts, nrings",
+    [
+        (wkb.WKB_LINESTRING, 1, 1),
+        (wkb.WKB_MULTILINESTRING, 3, 1),
+        (wkb.WKB_POLYGON, 1, 2),
+        (wkb.WKB_MULTIPOLYGON, 2, 2),
+    ],
+)
+def test_read_arcs_round_trip(flat_type, nparts, nrings, has_z, has_m):
+    dim = 2 + has_z + has_m
+    masks = [
+        np.array([False, False, True, True, False, True]),
+        np.array([True]),
+        np.array([False]),
+        np.array([True, False, False, True, True, True, False]),
+    ]
+    parts = []
+    for i in range(nparts):
+        rings = []
+        for j in range(nrings):
+            straight = masks[(i + j) % len(masks)]
+            rings.append((random_arcs(straight, dim, 10 * i + j), straight))
+        parts.append(rings)
+    builder = wkb.WkbBuilder(flat_type, has_z, has_m, nparts, curved=True)
+    for rings in parts:
+        builder.begin_part(len(rings))
+        for vertices, straight in rings:
+            builder.add_arcs(vertices, straight)
+    data = builder.wkb()
+    assert struct.unpack_from("<I", data, 1)[0] == wkb.wkb_type(wkb.curve_type(flat_type), has_z, has_m)
+    read_type, read_z, read_m, read_parts = wkb.read_arcs(data)
+    assert (read_type, read_z, read_m) == (wkb.curve_type(flat_type), has_z, has_m)
+    assert [len(rings) for rings in read_parts] == [nrings] * nparts
+    for rings, read_rings in zip(parts, read_parts):
+        for (vertices, straight), (read_vertices, read_straight) in zip(rings, read_rings):
+            np.testing.assert_array_equal(read_straight, straight)
+            np.testing.assert_allclose(read_vertices, vertices)
+
+
+def test_add_arcs_joins_runs():
+    straight = np.array([False, False, True, True, False, True])
+    vertices = random_arcs(straight, 2, 0)
+    builder = wkb.WkbBuilder(wkb.WKB_LINESTRING, False, False, 1, curved=True)
+    builder.begin_part(1)
+    builder.add_arcs(vertices, straight)
+    data = builder.wkb()
+    # compound curve of a circular string, a line string, a circular string and a line string
+    assert struct.unpack_from("<BII", data) == (1, wkb.WKB_COMPOUNDCURVE, 4)
+    offset = 9
+    for curve_type, count in [
+        (wkb.WKB_CIRCULARSTRING, 5),
+        (wkb.WKB_LINESTRING, 3),
+        (wkb.WKB_CIRCULARSTRING, 3),
+        (wkb.WKB_LINESTRING, 2),
+    ]:
+        assert struct.unpack_from("<BII", data, offset) == (1, curve_type, count)
+        offset += 9 + count * 16
+    assert offset == len(data)
+    # vertices shared by the curves are counted in each of them
+    assert builder.vertices == 5 + 3 + 3 + 2
+
+
+def test_read_arcs_of_lines():
+    line = random_ring(5, 2, 3)
+    vertices, straight = wkb.read_arcs(build(wkb.WKB_LINESTRING, False, False, [[line]]))[3][0][0]
+    assert straight.tolist() == [True] * 4
+    np.testing.assert_array_equal(vertices[0::2], line)
+    np.testing.assert_allclose(vertices[1::2], (line[:-1] + line[1:]) / 2.0)